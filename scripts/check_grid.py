@@ -0,0 +1,56 @@
+import sys
+
+import polars as pl
+
+from war_probs.grid import run_grid
+
+NUM_GAMES: int = 2_000
+SEED: int = 1
+SHARD_SIZE: int = 1_000
+OUTCOME_COLUMNS: tuple[str, ...] = ("id", "turns", "end_status", "winner")
+
+
+def check_num_players_grid() -> str | None:
+    """Sweep only `num_players`, mixing batch and `Game` configurations without a `k` sweep."""
+    result = run_grid(
+        {"battle_prize_card_reward": [3, 1], "num_players": [2, 3]},
+        NUM_GAMES,
+        seed=SEED,
+        workers=2,
+        shard_size=SHARD_SIZE,
+    )
+    games_per_configuration = result["games"].group_by("configuration").len()["len"]
+    if not (games_per_configuration == NUM_GAMES).all():
+        return f"configurations played {games_per_configuration.to_list()} games"
+    return None
+
+
+def check_engines_agree() -> str | None:
+    """The same two-player games, played by the batch engine and by `Game` for a `k` sweep."""
+    outcomes = []
+    for grid in ({}, {"k": [2, 3]}):
+        games = run_grid(grid, NUM_GAMES, seed=SEED, workers=1, shard_size=SHARD_SIZE)["games"]
+        outcomes.append(
+            games.filter(pl.col("configuration") == 0).select(OUTCOME_COLUMNS).sort("id")
+        )
+
+    batch_outcomes, game_outcomes = outcomes
+    if not batch_outcomes.equals(game_outcomes):
+        return "batch and `Game` outcomes differ, ties included"
+    return None
+
+
+def main() -> int:
+    mismatches: int = 0
+    for check in (check_num_players_grid, check_engines_agree):
+        mismatch = check()
+        if mismatch is not None:
+            mismatches += 1
+            print(f"> {check.__name__}: {mismatch}")
+
+    print(f"> Checked grid sweeps of {NUM_GAMES:,} games: {mismatches} mismatch(es).")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import random
+import sys
+
+from war_probs.game import Game, GameResult
+from war_probs.instrument import GameInstrumentation
+from war_probs.trace import TurnTrace
+
+NUM_DEALS: int = 1_000
+MAX_TURNS: int = 5_000
+SEED: int = 8
+
+
+def check_deal(game: Game, result: GameResult) -> str | None:
+    """Play a deal again with a trace and instrumentation, returning any mismatch."""
+    trace = TurnTrace()
+    instrumentation = GameInstrumentation()
+    observed_result = game.play(trace=trace, instrumentation=instrumentation)
+
+    for name in ("completed_turns", "end_status", "cycle_start", "cycle_length"):
+        if observed_result[name] != result[name]:
+            return f"{name} differs when observed, {observed_result[name]} vs. {result[name]}"
+    if observed_result["ending_hands"] != result["ending_hands"]:
+        return "ending hands differ when observed"
+    if instrumentation.turns != result["completed_turns"]:
+        return f"instrumentation counted {instrumentation.turns} turns"
+    if trace.num_turns != result["completed_turns"]:
+        return f"trace recorded {trace.num_turns} turns"
+    return None
+
+
+def main() -> int:
+    random.seed(SEED)
+    mismatches: int = 0
+    num_cycles: int = 0
+    for deal_num in range(NUM_DEALS):
+        game = Game(max_turns=MAX_TURNS, detect_cycles=True)
+        try:
+            result = game.play()
+        except ValueError:
+            ## -- tied wars that no player can continue end the game without a result
+            continue
+
+        num_cycles += result["end_status"] == "cycle"
+        mismatch = check_deal(game, result)
+        if mismatch is not None:
+            mismatches += 1
+            print(f"> Deal {deal_num} ({result['completed_turns']} turns) {mismatch}")
+
+    print(
+        f"> Checked {NUM_DEALS:,} observed deals, {num_cycles} ending in a cycle:"
+        f" {mismatches} mismatch(es)."
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
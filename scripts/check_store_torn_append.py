@@ -0,0 +1,65 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from war_probs.runner import plan_shards, simulate_shard
+from war_probs.store import (
+    RECORD_DTYPE,
+    RecordStore,
+    StoreSettings,
+    append_records,
+    summary_to_records,
+)
+
+NUM_GAMES: int = 200
+SEED: int = 2024
+SETTINGS = StoreSettings(max_turns=5_000, battle_prize_card_reward=3)
+## -- bytes of a record a crashed writer got out before dying
+TORN_BYTES: tuple[int, ...] = (1, RECORD_DTYPE.itemsize // 2, RECORD_DTYPE.itemsize - 1)
+
+
+def shard_records() -> list[np.ndarray]:
+    shards = plan_shards(NUM_GAMES, seed=SEED, shard_size=NUM_GAMES // 2, include_deals=True)
+    return [summary_to_records(simulate_shard(spec)) for spec in shards]
+
+
+def check_torn_append(
+    path: Path, first: np.ndarray, second: np.ndarray, torn: int
+) -> str | None:
+    """Append after a partial record, returning a description of any mismatch."""
+    append_records(path, first, SETTINGS)
+    with open(path, "ab") as file:
+        file.write(second[:1].tobytes()[:torn])
+    append_records(path, second, SETTINGS)
+
+    store = RecordStore(path)
+    expected = np.concatenate([first, second])
+    if len(store) != expected.size:
+        return f"store holds {len(store)} records, expected {expected.size}"
+    if not np.array_equal(np.asarray(store.records), expected):
+        return "records after the torn tail are misaligned"
+    return None
+
+
+def main() -> int:
+    first, second = shard_records()
+    mismatches: int = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for torn in TORN_BYTES:
+            path = Path(directory) / f"torn-{torn}.bin"
+            mismatch = check_torn_append(path, first, second, torn)
+            if mismatch is not None:
+                mismatches += 1
+                print(f"> Torn tail of {torn} byte(s): {mismatch}")
+
+    print(
+        f"> Checked appends after torn tails of {TORN_BYTES} bytes:"
+        f" {mismatches} mismatch(es)."
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
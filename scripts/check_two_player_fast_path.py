@@ -0,0 +1,94 @@
+import random
+import sys
+
+from war_probs.cards import load_cards
+from war_probs.encoded import (
+    RingHands,
+    _play_turn_encoded_two_players,
+    play_turn_encoded_general,
+)
+from war_probs.game import (
+    _play_turn_two_players,
+    distribute_cards_to_players,
+    play_turn_general,
+)
+
+NUM_DEALS: int = 500
+MAX_TURNS: int = 5_000
+SEED: int = 2024
+BATTLE_PRIZE_CARD_REWARDS: tuple[int, ...] = (1, 3)
+
+
+def _play_both(fast_path, general_path, fast_hands, general_hands, reward) -> tuple:
+    """Play one turn with each resolver, returning their outcomes or tie errors."""
+    outcomes = []
+    for turn_function, hands in ((fast_path, fast_hands), (general_path, general_hands)):
+        try:
+            outcomes.append(turn_function(hands, reward))
+        except ValueError as error:
+            outcomes.append(str(error))
+    return tuple(outcomes)
+
+
+def check_deal(cards, reward: int) -> str | None:
+    """Play a deal turn by turn on both paths, returning a description of any mismatch."""
+    fast_hands = distribute_cards_to_players(cards)
+    general_hands = distribute_cards_to_players(cards)
+    fast_encoded = RingHands.from_cards(fast_hands)
+    general_encoded = RingHands.from_cards(fast_hands)
+
+    for turn in range(1, MAX_TURNS + 1):
+        if not all(fast_hands):
+            return None
+
+        ## -- card tuples, through `play_turn`'s two resolvers
+        fast_outcome, general_outcome = _play_both(
+            _play_turn_two_players, play_turn_general, fast_hands, general_hands, reward
+        )
+        if isinstance(fast_outcome, str) or isinstance(general_outcome, str):
+            if fast_outcome != general_outcome:
+                return f"turn {turn}: tie raised by only one card path"
+        if [list(hand) for hand in fast_hands] != [list(hand) for hand in general_hands]:
+            return f"turn {turn}: card hands differ"
+
+        ## -- encoded ring buffers, through `play_turn_encoded`'s two resolvers
+        fast_summary, general_summary = _play_both(
+            _play_turn_encoded_two_players,
+            play_turn_encoded_general,
+            fast_encoded,
+            general_encoded,
+            reward,
+        )
+        if fast_summary != general_summary:
+            return f"turn {turn}: turn summaries differ, {fast_summary} vs. {general_summary}"
+        if fast_encoded.to_lists() != general_encoded.to_lists():
+            return f"turn {turn}: encoded hands differ"
+        if fast_encoded.to_cards() != [list(hand) for hand in fast_hands]:
+            return f"turn {turn}: encoded and card hands differ"
+
+        if isinstance(fast_outcome, str):
+            return None
+    return None
+
+
+def main() -> int:
+    random.seed(SEED)
+    decks = [load_cards() for _ in range(NUM_DEALS)]
+
+    mismatches: int = 0
+    for reward in BATTLE_PRIZE_CARD_REWARDS:
+        for deal_num, cards in enumerate(decks):
+            mismatch = check_deal(cards, reward)
+            if mismatch is not None:
+                mismatches += 1
+                print(f"> Deal {deal_num} (reward {reward}) {mismatch}")
+
+    print(
+        f"> Checked {NUM_DEALS:,} deals at rewards {BATTLE_PRIZE_CARD_REWARDS}:"
+        f" {mismatches} mismatch(es)."
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,19 +19,19 @@ def main():
 
     for _ in range(NUM_SIMULATIONS):
         ## -- initialize a game
-        game = Game(max_turns=MAX_TURNS)
+        game = Game(max_turns=MAX_TURNS, detect_cycles=True)
 
         ## -- simulate game
         results = game.play()
 
-        if results["completed_turns"] < MAX_TURNS:
+        if results["end_status"] == "winner":
             completed_games.append(results)
         else:
             draw_games.append(results)
 
     ## ---- compare number of completed vs. draw games
     print(
-        f"> {len(completed_games):,} games ended with a winner. {len(draw_games)} ended in a draw."
+        f"> {len(completed_games):,} games ended with a winner. {len(draw_games)} ended in a draw or cycle."
     )
 
     ## ---- get number of turns from all completed games
@@ -0,0 +1,187 @@
+"""
+Sequential stopping: simulate until a statistic is known to a target precision.
+
+Games are played shard by shard, in the same order and from the same random streams as
+`war_probs.runner.run_simulations`, and after every round the confidence interval of the
+target statistic is checked against the requested width. Each round is sized from the
+current interval, since its width shrinks with the square root of the number of games.
+
+Turn statistics are computed over games that end with a winner, and win probabilities
+over all games played. Checking the interval after every round makes the reported
+coverage slightly optimistic, so ask for a little more confidence than you need.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Literal, TypedDict
+
+from war_probs.runner import (
+    DEFAULT_SHARD_SIZE,
+    plan_shards,
+    resolve_seed,
+    simulate_shard,
+)
+from war_probs.stats import OutcomeTally, TurnCountAccumulator
+
+TargetStatistic = Literal["mean_turns", "win_probability", "quantile"]
+
+DEFAULT_MIN_GAMES: int = 10_000
+DEFAULT_MAX_GAMES: int = 10_000_000
+
+
+class AdaptiveResult(TypedDict):
+    statistic: TargetStatistic
+    estimate: float
+    ci_lower: float
+    ci_upper: float
+    ci_width: float
+    target_width: float
+    confidence: float
+    converged: bool
+    num_games: int
+    num_rounds: int
+    seed: int
+
+
+def _mean_interval(turn_counts: TurnCountAccumulator, z: float) -> tuple[float, float, float]:
+    count = turn_counts.count
+    if count < 2:
+        return math.nan, -math.inf, math.inf
+    ## -- sample standard deviation from the accumulator's population one
+    sample_std = turn_counts.std * math.sqrt(count / (count - 1))
+    half_width = z * sample_std / math.sqrt(count)
+    return turn_counts.mean, turn_counts.mean - half_width, turn_counts.mean + half_width
+
+
+def _wilson_interval(successes: int, trials: int, z: float) -> tuple[float, float, float]:
+    if trials == 0:
+        return math.nan, 0.0, 1.0
+    proportion = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (proportion + z**2 / (2 * trials)) / denominator
+    half_width = (
+        z * math.sqrt(proportion * (1 - proportion) / trials + z**2 / (4 * trials**2))
+    ) / denominator
+    return proportion, center - half_width, center + half_width
+
+
+def _quantile_interval(
+    turn_counts: TurnCountAccumulator, q: float, z: float
+) -> tuple[float, float, float]:
+    """Distribution-free interval from the order statistics around rank `q * count`."""
+    count = turn_counts.count
+    if count < 2:
+        return math.nan, -math.inf, math.inf
+    spread = z * math.sqrt(count * q * (1 - q))
+    lower_rank = max(math.floor(count * q - spread), 0)
+    upper_rank = min(math.ceil(count * q + spread), count - 1)
+    return (
+        float(turn_counts.quantile(q)),
+        float(turn_counts.quantile(lower_rank / (count - 1))),
+        float(turn_counts.quantile(upper_rank / (count - 1))),
+    )
+
+
+def _interval(
+    tally: OutcomeTally, statistic: TargetStatistic, quantile: float, player: int, z: float
+) -> tuple[float, float, float]:
+    if statistic == "mean_turns":
+        return _mean_interval(tally.turn_counts, z)
+    if statistic == "win_probability":
+        return _wilson_interval(tally.player_wins[player], tally.num_games, z)
+    return _quantile_interval(tally.turn_counts, quantile, z)
+
+
+def run_until_precise(
+    statistic: TargetStatistic,
+    target_width: float,
+    confidence: float = 0.95,
+    quantile: float = 0.5,
+    player: int = 0,
+    min_games: int = DEFAULT_MIN_GAMES,
+    max_games: int = DEFAULT_MAX_GAMES,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> AdaptiveResult:
+    """
+    Simulate two-player games until the `confidence` interval of `statistic` is no wider
+    than `target_width`, or `max_games` have been played.
+
+    `statistic` is the mean turn count, the probability that `player` wins, or the
+    `quantile` of the turn count. Games are always played in whole shards, so the run
+    uses at most one shard more than the interval needs.
+    """
+    assert target_width > 0, f"Target width must be positive, got '{target_width}'."
+    assert 0 < confidence < 1, f"Confidence must be between 0 and 1, got '{confidence}'."
+    assert 0 < quantile < 1, f"Quantile must be between 0 and 1, got '{quantile}'."
+    assert statistic in (
+        "mean_turns",
+        "win_probability",
+        "quantile",
+    ), f"Unknown target statistic '{statistic}'."
+
+    seed = resolve_seed(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    shards = plan_shards(
+        max_games,
+        seed=seed,
+        max_turns=max_turns,
+        battle_prize_card_reward=battle_prize_card_reward,
+        shard_size=shard_size,
+    )
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    tally = OutcomeTally()
+    num_rounds: int = 0
+    next_shard: int = 0
+    round_games: int = min_games
+    estimate, ci_lower, ci_upper = math.nan, -math.inf, math.inf
+    try:
+        while next_shard < len(shards):
+            ## -- whole shards covering the games this round needs
+            num_shards = max(math.ceil(round_games / shard_size), 1)
+            round_shards = shards[next_shard : next_shard + num_shards]
+            next_shard += len(round_shards)
+            if pool is None or len(round_shards) == 1:
+                summaries = map(simulate_shard, round_shards)
+            else:
+                summaries = pool.map(simulate_shard, round_shards)
+            for summary in summaries:
+                tally.add(summary)
+            num_rounds += 1
+
+            estimate, ci_lower, ci_upper = _interval(tally, statistic, quantile, player, z)
+            ci_width = ci_upper - ci_lower
+            if ci_width <= target_width:
+                break
+
+            ## -- interval width shrinks with the square root of the number of games
+            if math.isfinite(ci_width):
+                needed_games = tally.num_games * (ci_width / target_width) ** 2
+                round_games = math.ceil(needed_games) - tally.num_games
+            else:
+                round_games = tally.num_games
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    ci_width = ci_upper - ci_lower
+    return AdaptiveResult(
+        statistic=statistic,
+        estimate=estimate,
+        ci_lower=ci_lower,
+        ci_upper=ci_upper,
+        ci_width=ci_width,
+        target_width=target_width,
+        confidence=confidence,
+        converged=bool(ci_width <= target_width),
+        num_games=tally.num_games,
+        num_rounds=num_rounds,
+        seed=seed,
+    )
@@ -0,0 +1,219 @@
+"""
+Lockstep batch engine for simulating many two-player games of war at once.
+
+All hands are held as NumPy ring buffers of card codes (see `war_probs.cards.encode_card`)
+and every active game is advanced by one face-off per step. A turn that goes to war
+spans several steps, so the turn counter only advances when a game starts a new turn.
+The rules, including forfeits during war, mirror `war_probs.game.play_turn` exactly.
+"""
+
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.cards import CARD_VALUES
+from war_probs.dealing import deal_decks, split_hands
+
+EndStatusCode = int
+
+## -- end status codes reported per game
+STATUS_WINNER: EndStatusCode = 0
+STATUS_DRAW: EndStatusCode = 1
+STATUS_TIE: EndStatusCode = 2
+
+## -- `STATUS_TIE` marks games where both players forfeit in the same war,
+## -- which `play_turn` signals by raising a `ValueError`
+END_STATUS_LABELS: tuple[str, ...] = ("winner", "draw", "tie")
+
+_STATUS_ACTIVE: EndStatusCode = -1
+
+
+class BatchResult(TypedDict):
+    deals: np.ndarray
+    completed_turns: np.ndarray
+    end_status: np.ndarray
+    player_scores: np.ndarray
+
+
+def _segments(lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row index and offset within row for a flattened set of variable length segments."""
+    rows = np.repeat(np.arange(lengths.size), lengths)
+    starts = np.cumsum(lengths) - lengths
+    offsets = np.arange(rows.size) - np.repeat(starts, lengths)
+    return rows, offsets
+
+
+class _LockstepState:
+    """Ring buffer hands and prize card pots, flattened for cheap fancy indexing."""
+
+    def __init__(self, decks: np.ndarray) -> None:
+        n_games, deck_length = decks.shape
+        self.capacity = deck_length
+
+        ## -- deal matches `distribute_cards_to_players`, first player takes any odd card
+        hands = np.zeros((n_games, 2, deck_length), dtype=np.uint8)
+        sizes = np.empty((n_games, 2), dtype=np.int64)
+        for player, hand in enumerate(split_hands(decks, num_players=2)):
+            hands[:, player, : hand.shape[1]] = hand
+            sizes[:, player] = hand.shape[1]
+
+        ## -- hand `game * 2 + player` occupies slots `[hand * capacity, (hand + 1) * capacity)`
+        self.hands = hands.reshape(-1)
+        self.heads = np.zeros(n_games * 2, dtype=np.int64)
+        self.sizes = sizes.reshape(-1)
+
+        ## -- prize cards accumulated during a war
+        self.pot = np.zeros(n_games * deck_length, dtype=np.uint8)
+        self.pot_sizes = np.zeros(n_games, dtype=np.int64)
+
+    def pop(self, hands: np.ndarray) -> np.ndarray:
+        heads = self.heads[hands]
+        cards = self.hands[hands * self.capacity + heads]
+        heads += 1
+        heads[heads == self.capacity] = 0
+        self.heads[hands] = heads
+        self.sizes[hands] -= 1
+        return cards
+
+    def push(self, hands: np.ndarray, cards: np.ndarray) -> None:
+        tails = (self.heads[hands] + self.sizes[hands]) % self.capacity
+        self.hands[hands * self.capacity + tails] = cards
+        self.sizes[hands] += 1
+
+    def add_to_pot(self, games: np.ndarray, cards: np.ndarray) -> None:
+        pot_sizes = self.pot_sizes[games]
+        self.pot[games * self.capacity + pot_sizes] = cards
+        self.pot_sizes[games] = pot_sizes + 1
+
+    def forfeit_hand_to_pot(self, games: np.ndarray, hands: np.ndarray) -> None:
+        lengths = self.sizes[hands]
+        rows, offsets = _segments(lengths)
+        src_hands = hands[rows]
+        src_games = games[rows]
+        src_slots = (self.heads[src_hands] + offsets) % self.capacity
+        dst_slots = self.pot_sizes[src_games] + offsets
+        self.pot[src_games * self.capacity + dst_slots] = self.hands[
+            src_hands * self.capacity + src_slots
+        ]
+
+        self.pot_sizes[games] += lengths
+        self.heads[hands] = 0
+        self.sizes[hands] = 0
+
+    def award_pot(self, games: np.ndarray, hands: np.ndarray) -> None:
+        lengths = self.pot_sizes[games]
+        rows, offsets = _segments(lengths)
+        dst_hands = hands[rows]
+        tails = self.heads[dst_hands] + self.sizes[dst_hands] + offsets
+        self.hands[dst_hands * self.capacity + tails % self.capacity] = self.pot[
+            games[rows] * self.capacity + offsets
+        ]
+
+        self.sizes[hands] += lengths
+        self.pot_sizes[games] = 0
+
+
+def simulate_batch(
+    n_games: int | None = None,
+    max_turns: int = 5_000,
+    seed: int | np.random.Generator | None = None,
+    decks: np.ndarray | None = None,
+    battle_prize_card_reward: int = 3,
+) -> BatchResult:
+    """
+    Simulate many two-player games of war in lockstep.
+
+    Games are dealt from `seed` unless `decks`, an `(n_games, deck_length)` array of
+    card codes, is provided. As with `Game.play`, a game still running after
+    `max_turns` turns is stopped after one more turn and reported as a draw.
+    """
+    ## -- get decks of card codes
+    if decks is None:
+        assert n_games is not None, "Either `n_games` or `decks` must be provided."
+        decks = deal_decks(n_games, np.random.default_rng(seed))
+    decks = np.asarray(decks, dtype=np.uint8)
+    n_games = decks.shape[0]
+
+    card_values = np.asarray(CARD_VALUES, dtype=np.int8)
+    state = _LockstepState(decks)
+
+    at_war = np.zeros(n_games, dtype=bool)
+    completed_turns = np.zeros(n_games, dtype=np.int64)
+    end_status = np.full(n_games, _STATUS_ACTIVE, dtype=np.int8)
+
+    active = np.arange(n_games)
+
+    while active.size > 0:
+        first_hands = active * 2
+        second_hands = first_hands + 1
+
+        ## -- games not in the middle of a war start a new turn
+        war_mask = at_war[active]
+        completed_turns[active[~war_mask]] += 1
+
+        ## -- players at war put down prize cards first
+        war_games = active[war_mask]
+        if war_games.size > 0:
+            for player in (0, 1):
+                for _ in range(battle_prize_card_reward):
+                    state.add_to_pot(war_games, state.pop(war_games * 2 + player))
+
+        ## -- get next cards from each player
+        first_cards = state.pop(first_hands)
+        second_cards = state.pop(second_hands)
+        first_values = card_values[first_cards]
+        second_values = card_values[second_cards]
+
+        ## -- single winner, played cards then prize cards go to winner
+        has_winner = first_values != second_values
+        won_games = active[has_winner]
+        winning_hands = won_games * 2 + (
+            second_values[has_winner] > first_values[has_winner]
+        )
+        state.push(winning_hands, first_cards[has_winner])
+        state.push(winning_hands, second_cards[has_winner])
+        state.award_pot(won_games, winning_hands)
+        at_war[won_games] = False
+
+        ## -- !! war !!
+        tied = ~has_winner
+        war_games = active[tied]
+        state.add_to_pot(war_games, first_cards[tied])
+        state.add_to_pot(war_games, second_cards[tied])
+
+        ## -- players without enough cards for war forfeit their remaining cards
+        first_forfeits = state.sizes[war_games * 2] <= battle_prize_card_reward
+        second_forfeits = state.sizes[war_games * 2 + 1] <= battle_prize_card_reward
+        state.forfeit_hand_to_pot(
+            war_games[first_forfeits], war_games[first_forfeits] * 2
+        )
+        state.forfeit_hand_to_pot(
+            war_games[second_forfeits], war_games[second_forfeits] * 2 + 1
+        )
+
+        end_status[war_games[first_forfeits & second_forfeits]] = STATUS_TIE
+
+        ## -- last player standing takes the prize cards
+        one_forfeit = first_forfeits ^ second_forfeits
+        state.award_pot(
+            war_games[one_forfeit], war_games[one_forfeit] * 2 + first_forfeits[one_forfeit]
+        )
+        at_war[war_games] = ~(first_forfeits | second_forfeits)
+
+        ## -- check for completed games at the end of each turn
+        turn_over = active[~at_war[active] & (end_status[active] == _STATUS_ACTIVE)]
+        has_empty_hand = (state.sizes[turn_over * 2] == 0) | (
+            state.sizes[turn_over * 2 + 1] == 0
+        )
+        end_status[turn_over[has_empty_hand]] = STATUS_WINNER
+        out_of_turns = turn_over[~has_empty_hand]
+        end_status[out_of_turns[completed_turns[out_of_turns] > max_turns]] = STATUS_DRAW
+
+        active = active[end_status[active] == _STATUS_ACTIVE]
+
+    return BatchResult(
+        deals=decks,
+        completed_turns=completed_turns,
+        end_status=end_status,
+        player_scores=state.sizes.reshape(n_games, 2).copy(),
+    )
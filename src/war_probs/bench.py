@@ -0,0 +1,431 @@
+"""
+Benchmarks for the simulator hot paths, with stored JSON baselines.
+
+Every benchmark runs on a fixed-seed corpus of deals, so numbers from different runs
+are comparable. Timings on a shared machine slow down for whole runs at a time, so
+reports from several runs are combined, keeping each benchmark's fastest time. Usage:
+
+    python -m war_probs.bench run --output benchmarks/run-1.json
+    python -m war_probs.bench run --output benchmarks/run-2.json
+    python -m war_probs.bench combine benchmarks/baseline.json benchmarks/run-*.json
+    python -m war_probs.bench compare benchmarks/baseline.json benchmarks/current-*.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.cards import Card, load_cards
+from war_probs.dealing import deal_decks
+from war_probs.game import (
+    Game,
+    distribute_cards_to_players,
+    play_turn,
+    rank_cards,
+    score_played_cards,
+)
+from war_probs.instrument import GameInstrumentation
+from war_probs.metrics import turn_values_matrix
+
+DEFAULT_BASELINE_PATH: str = "benchmarks/baseline.json"
+DEFAULT_SEED: int = 2024
+DEFAULT_REPEATS: int = 15
+DEFAULT_THRESHOLD: float = 0.25
+## -- slowdowns smaller than this are noise for operations taking a few microseconds
+DEFAULT_MIN_SLOWDOWN_US: float = 0.5
+
+## -- the simulation core imports with only the standard library and NumPy
+CORE_MODULES: tuple[str, ...] = ("war_probs.cards", "war_probs.game", "war_probs.metrics")
+PLOTTING_MODULES: tuple[str, ...] = ("matplotlib", "seaborn")
+
+## -- a benchmark builds its inputs from a seed and returns (run, ops per run, setup)
+## -- `setup` is called untimed before every run, and its result is passed to `run`
+BenchmarkCase = tuple[Callable[[object], object], int, Callable[[], object]]
+Benchmark = Callable[[int], BenchmarkCase]
+
+
+def _no_setup() -> None:
+    return None
+
+
+class BenchmarkResult(TypedDict):
+    seconds_per_op: float
+    ops: int
+    repeats: int
+
+
+class BenchmarkReport(TypedDict):
+    created: str
+    python: str
+    platform: str
+    seed: int
+    benchmarks: dict[str, BenchmarkResult]
+
+
+## ------------------------------------------------- ##
+## ---- FIXED-SEED DEAL CORPORA --------------------- ##
+## ------------------------------------------------- ##
+
+
+def deal_corpus(seed: int, size: int) -> list[list[Card]]:
+    rng = random.Random(seed)
+    ordered = load_cards(shuffle=False)
+    return [rng.sample(ordered, k=len(ordered)) for _ in range(size)]
+
+
+def war_free_hands(seed: int, size: int) -> list[list[list[Card]]]:
+    """Two-player hands whose first cards differ in value."""
+    hands = []
+    for cards in deal_corpus(seed, size * 2):
+        first, second = cards[:26], cards[26:]
+        if first[0].value != second[0].value:
+            hands.append([first, second])
+    return hands[:size]
+
+
+def war_heavy_hands(seed: int, size: int, war_depth: int = 3) -> list[list[list[Card]]]:
+    """Two-player hands whose first turn goes to war `war_depth` times in a row."""
+    rng = random.Random(seed)
+    hands = []
+    for cards in deal_corpus(seed, size * 2):
+        first, remaining = cards[:26], cards[26:]
+
+        ## -- match the value of each face-up card in the war chain
+        face_up_positions = [war * 4 for war in range(war_depth)]
+        matches: list[Card] = []
+        for position in face_up_positions:
+            match = next(
+                (card for card in remaining if card.value == first[position].value), None
+            )
+            if match is None:
+                break
+            remaining.remove(match)
+            matches.append(match)
+        if len(matches) < war_depth:
+            continue
+
+        rng.shuffle(remaining)
+        second = remaining
+        for position, match in zip(face_up_positions, matches):
+            second.insert(position, match)
+        hands.append([first, second])
+    return hands[:size]
+
+
+## ------------------------------------------------- ##
+## ---- BENCHMARKS ---------------------------------- ##
+## ------------------------------------------------- ##
+
+
+def _bench_load_cards(seed: int):
+    def run(_):
+        random.seed(seed)
+        for _ in range(1_000):
+            load_cards()
+
+    return run, 1_000, _no_setup
+
+
+def _bench_deal_decks(seed: int):
+    def run(_):
+        deal_decks(10_000, np.random.default_rng(seed))
+
+    return run, 10_000, _no_setup
+
+
+def _bench_distribute_cards_to_players(seed: int):
+    corpus = deal_corpus(seed, 1_000)
+
+    def run(_):
+        for cards in corpus:
+            distribute_cards_to_players(cards)
+
+    return run, len(corpus), _no_setup
+
+
+def _bench_rank_cards(seed: int):
+    played = [cards[:2] for cards in deal_corpus(seed, 5_000)]
+
+    def run(_):
+        for cards in played:
+            rank_cards(cards)
+
+    return run, len(played), _no_setup
+
+
+def _bench_score_played_cards(seed: int):
+    played = [cards[:2] for cards in deal_corpus(seed, 5_000)]
+
+    def run(_):
+        for cards in played:
+            score_played_cards(cards)
+
+    return run, len(played), _no_setup
+
+
+def _play_turn_benchmark(corpus: list[list[list[Card]]]):
+    ## -- turns mutate hands, so each run plays fresh copies
+    def setup():
+        return [[deque(hand) for hand in hands] for hands in corpus]
+
+    def run(players_hands):
+        for hands in players_hands:
+            play_turn(hands)
+
+    return run, len(corpus), setup
+
+
+def _bench_play_turn_war_free(seed: int):
+    return _play_turn_benchmark(war_free_hands(seed, 2_000))
+
+
+def _bench_play_turn_war_heavy(seed: int):
+    return _play_turn_benchmark(war_heavy_hands(seed, 2_000))
+
+
+def _bench_game_play(seed: int):
+    corpus = deal_corpus(seed, 50)
+
+    def run(_):
+        for cards in corpus:
+            Game(cards=cards, max_turns=5_000).play()
+
+    return run, len(corpus), _no_setup
+
+
+def _bench_game_play_eight_players(seed: int):
+    corpus = deal_corpus(seed, 50)
+
+    def run(_):
+        for cards in corpus:
+            try:
+                Game(num_players=8, cards=cards, max_turns=5_000).play()
+            except ValueError:
+                ## -- tied wars that no player can continue end the game
+                pass
+
+    return run, len(corpus), _no_setup
+
+
+def _bench_game_play_instrumented(seed: int):
+    corpus = deal_corpus(seed, 50)
+
+    def run(instrumentation):
+        for cards in corpus:
+            Game(cards=cards, max_turns=5_000).play(instrumentation=instrumentation)
+
+    return run, len(corpus), GameInstrumentation
+
+
+def _bench_import_core(seed: int):
+    """Import the core in a fresh interpreter, failing if it pulls in a plotting library."""
+    script = (
+        f"import sys\n"
+        f"import {', '.join(CORE_MODULES)}\n"
+        f"leaked = sorted(set({PLOTTING_MODULES!r}) & set(sys.modules))\n"
+        f"sys.exit(f'Core modules import plotting libraries: {{leaked}}' if leaked else 0)\n"
+    )
+
+    def run(_):
+        for _ in range(5):
+            subprocess.run([sys.executable, "-c", script], check=True)
+
+    return run, 5, _no_setup
+
+
+def _bench_turn_values_matrix(seed: int):
+    def run(_):
+        for _ in range(1_000):
+            turn_values_matrix()
+
+    return run, 1_000, _no_setup
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "load_cards": _bench_load_cards,
+    "deal_decks": _bench_deal_decks,
+    "distribute_cards_to_players": _bench_distribute_cards_to_players,
+    "rank_cards": _bench_rank_cards,
+    "score_played_cards": _bench_score_played_cards,
+    "play_turn_war_free": _bench_play_turn_war_free,
+    "play_turn_war_heavy": _bench_play_turn_war_heavy,
+    "game_play": _bench_game_play,
+    "game_play_eight_players": _bench_game_play_eight_players,
+    "game_play_instrumented": _bench_game_play_instrumented,
+    "turn_values_matrix": _bench_turn_values_matrix,
+    "import_core": _bench_import_core,
+}
+
+
+def time_benchmarks(
+    benchmarks: dict[str, Benchmark],
+    seed: int = DEFAULT_SEED,
+    repeats: int = DEFAULT_REPEATS,
+) -> dict[str, BenchmarkResult]:
+    """
+    Best of `repeats` runs of every benchmark, reported per operation. After an untimed
+    warm-up run of each, runs are interleaved across benchmarks, so a slow spell on the
+    machine slows one run of many benchmarks rather than every run of one. Garbage
+    collection is paused during timed runs.
+    """
+    cases = {name: benchmark(seed) for name, benchmark in benchmarks.items()}
+    for run, _, setup in cases.values():
+        run(setup())
+
+    timings: dict[str, list[float]] = {name: [] for name in cases}
+    for _ in range(repeats):
+        for name, (run, _, setup) in cases.items():
+            inputs = setup()
+            ## -- as `timeit` does, so collections triggered by other runs do not land here
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run(inputs)
+                timings[name].append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+
+    return {
+        name: BenchmarkResult(
+            seconds_per_op=min(timings[name]) / ops, ops=ops, repeats=repeats
+        )
+        for name, (_, ops, _) in cases.items()
+    }
+
+
+def run_benchmarks(
+    names: list[str] | None = None,
+    seed: int = DEFAULT_SEED,
+    repeats: int = DEFAULT_REPEATS,
+) -> BenchmarkReport:
+    names = names or list(BENCHMARKS)
+    results = time_benchmarks(
+        {name: BENCHMARKS[name] for name in names}, seed=seed, repeats=repeats
+    )
+    for name, result in results.items():
+        print(f"> {name}: {result['seconds_per_op'] * 1e6:,.2f}us per op")
+
+    return BenchmarkReport(
+        created=datetime.now(timezone.utc).isoformat(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        seed=seed,
+        benchmarks=results,
+    )
+
+
+def save_report(report: BenchmarkReport, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+
+
+def load_report(path: str | Path) -> BenchmarkReport:
+    return json.loads(Path(path).read_text())
+
+
+def combine_reports(reports: list[BenchmarkReport]) -> BenchmarkReport:
+    """Fastest result of every benchmark across reports, e.g., of runs at different times."""
+    assert reports, "Need at least one report to combine."
+    combined = BenchmarkReport(**{**reports[-1], "benchmarks": {}})
+    for report in reports:
+        for name, result in report["benchmarks"].items():
+            fastest = combined["benchmarks"].get(name)
+            if fastest is None or result["seconds_per_op"] < fastest["seconds_per_op"]:
+                combined["benchmarks"][name] = result
+    return combined
+
+
+def compare_reports(
+    baseline: BenchmarkReport,
+    current: BenchmarkReport,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_slowdown_us: float = DEFAULT_MIN_SLOWDOWN_US,
+) -> list[str]:
+    """
+    Print a comparison table and return benchmarks slower than the threshold allows, and
+    by more than `min_slowdown_us` microseconds per operation.
+    """
+    regressions: list[str] = []
+    print(f"{'benchmark':<32}{'baseline (us)':>16}{'current (us)':>16}{'change':>10}")
+    for name, result in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            print(f"{name:<32}{'-':>16}{result['seconds_per_op'] * 1e6:>16,.2f}{'new':>10}")
+            continue
+
+        before = baseline["benchmarks"][name]["seconds_per_op"]
+        after = result["seconds_per_op"]
+        change = after / before - 1
+        regressed = change > threshold and (after - before) * 1e6 > min_slowdown_us
+        flag = "  << REGRESSION" if regressed else ""
+        print(f"{name:<32}{before * 1e6:>16,.2f}{after * 1e6:>16,.2f}{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m war_probs.bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and store a JSON report.")
+    run_parser.add_argument("--output", default=DEFAULT_BASELINE_PATH)
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+
+    combine_parser = commands.add_parser(
+        "combine", help="Keep every benchmark's fastest time across reports."
+    )
+    combine_parser.add_argument("output")
+    combine_parser.add_argument("reports", nargs="+")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions against a baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="+", help="Reports of one or more runs.")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument(
+        "--min-slowdown-us", type=float, default=DEFAULT_MIN_SLOWDOWN_US
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(args.only, seed=args.seed, repeats=args.repeats)
+        save_report(report, args.output)
+        print(f"> Saved benchmark report to {args.output}")
+        return 0
+
+    if args.command == "combine":
+        save_report(combine_reports([load_report(path) for path in args.reports]), args.output)
+        print(f"> Saved fastest of {len(args.reports)} report(s) to {args.output}")
+        return 0
+
+    regressions = compare_reports(
+        load_report(args.baseline),
+        combine_reports([load_report(path) for path in args.current]),
+        threshold=args.threshold,
+        min_slowdown_us=args.min_slowdown_us,
+    )
+    if regressions:
+        print(f"> {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("> No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
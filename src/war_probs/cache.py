@@ -0,0 +1,267 @@
+"""
+Persistent cache of game outcomes, keyed on canonical deals.
+
+Only card values are compared during play, so every deal with the same sequence of
+values (and the same game settings) plays out identically, whatever the suits. The
+cache maps that value sequence to the outcome in a SQLite database, evicting the least
+recently used entries once it holds more than `max_entries` outcomes. Scores and
+ending positions are stored as little-endian 16-bit integers, enough for shoes of
+any number of decks a game can deal.
+"""
+
+import sqlite3
+import struct
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.cards import CARD_VALUES, Value
+
+DealKey = bytes
+
+DEFAULT_MAX_ENTRIES: int = 1_000_000
+
+## -- fraction of entries removed at once when the cache is over its limit
+_EVICTION_FRACTION: float = 0.1
+
+## -- sqlite limits the number of bound parameters per statement
+_LOOKUP_CHUNK_SIZE: int = 500
+
+## -- card values are packed two per byte, as offsets from the lowest value
+_MIN_CARD_VALUE: int = Value.TWO.value
+_PAD_NIBBLE: int = 0xF
+
+## -- bumped whenever stored outcomes change format, discarding older caches
+_SCHEMA_VERSION: int = 2
+_COUNT_DTYPE = np.dtype("<u2")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    key BLOB PRIMARY KEY,
+    completed_turns INTEGER NOT NULL,
+    end_status TEXT NOT NULL,
+    player_scores BLOB NOT NULL,
+    cycle_start INTEGER,
+    cycle_length INTEGER,
+    ending_positions BLOB,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outcomes_last_used ON outcomes (last_used);
+"""
+
+
+class CachedOutcome(TypedDict):
+    completed_turns: int
+    end_status: str
+    player_scores: list[int]
+    cycle_start: int | None
+    cycle_length: int | None
+    ## -- deal positions of the cards in each player's ending hand, if known
+    ending_positions: list[list[int]] | None
+
+
+def _key_header(
+    num_players: int, max_turns: int, battle_prize_card_reward: int, detect_cycles: bool
+) -> bytes:
+    return struct.pack(
+        "<IBB?", max_turns, battle_prize_card_reward, num_players, detect_cycles
+    )
+
+
+def _pack_values(values: np.ndarray) -> np.ndarray:
+    """Pack rows of card values two per byte."""
+    offsets = values.astype(np.int16) - _MIN_CARD_VALUE
+    assert (
+        offsets.min(initial=0) >= 0 and offsets.max(initial=0) < _PAD_NIBBLE
+    ), "Card values must fit in a nibble to build a deal key."
+    offsets = offsets.astype(np.uint8)
+    if offsets.shape[1] % 2 == 1:
+        padding = np.full((offsets.shape[0], 1), _PAD_NIBBLE, dtype=np.uint8)
+        offsets = np.hstack([offsets, padding])
+    return (offsets[:, 0::2] << 4) | offsets[:, 1::2]
+
+
+def deal_key(
+    deal_values: Sequence[int],
+    num_players: int = 2,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    detect_cycles: bool = False,
+) -> DealKey:
+    """
+    Canonical key for a deal: the game settings, followed by card values in dealt order.
+    Hands are dealt as consecutive runs of the deck, so this is each player's value
+    sequence in turn.
+    """
+    header = _key_header(num_players, max_turns, battle_prize_card_reward, detect_cycles)
+    packed = _pack_values(np.asarray(deal_values, dtype=np.int16)[None, :])
+    return header + packed.tobytes()
+
+
+def deal_keys(
+    decks: np.ndarray,
+    num_players: int = 2,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    detect_cycles: bool = False,
+) -> list[DealKey]:
+    """Keys for rows of card codes, as dealt by `war_probs.dealing.deal_decks`."""
+    header = _key_header(num_players, max_turns, battle_prize_card_reward, detect_cycles)
+    packed = _pack_values(np.asarray(CARD_VALUES, dtype=np.int16)[decks])
+    return [header + row.tobytes() for row in packed]
+
+
+def _pack_counts(counts: Sequence[int]) -> bytes:
+    return np.asarray(counts, dtype=_COUNT_DTYPE).tobytes()
+
+
+def _unpack_counts(blob: bytes) -> list[int]:
+    return np.frombuffer(blob, dtype=_COUNT_DTYPE).tolist()
+
+
+def _pack_positions(ending_positions: list[list[int]] | None) -> bytes | None:
+    if ending_positions is None:
+        return None
+    return _pack_counts([position for hand in ending_positions for position in hand])
+
+
+def _unpack_positions(blob: bytes | None, player_scores: list[int]) -> list[list[int]] | None:
+    if blob is None:
+        return None
+    positions = _unpack_counts(blob)
+    hands: list[list[int]] = []
+    start: int = 0
+    for score in player_scores:
+        hands.append(positions[start : start + score])
+        start += score
+    return hands
+
+
+class OutcomeCache:
+    def __init__(
+        self, path: str | Path, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+
+        ## -- several worker processes may share one cache file
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS outcomes")
+                self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+        self._num_entries: int = self._connection.execute(
+            "SELECT COUNT(*) FROM outcomes"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._num_entries
+
+    def get(self, key: DealKey) -> CachedOutcome | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[DealKey]) -> dict[DealKey, CachedOutcome]:
+        found: dict[DealKey, CachedOutcome] = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            chunk = keys[start : start + _LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                "SELECT key, completed_turns, end_status, player_scores, cycle_start,"
+                f" cycle_length, ending_positions FROM outcomes WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for key, turns, status, scores, cycle_start, cycle_length, positions in rows:
+                player_scores = _unpack_counts(scores)
+                found[key] = CachedOutcome(
+                    completed_turns=turns,
+                    end_status=status,
+                    player_scores=player_scores,
+                    cycle_start=cycle_start,
+                    cycle_length=cycle_length,
+                    ending_positions=_unpack_positions(positions, player_scores),
+                )
+
+        ## -- mark hits as recently used
+        if found:
+            now = time.time_ns()
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE outcomes SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def put(self, key: DealKey, outcome: CachedOutcome) -> None:
+        self.put_many([(key, outcome)])
+
+    def put_many(self, items: Iterable[tuple[DealKey, CachedOutcome]]) -> None:
+        now = time.time_ns()
+        rows = [
+            (
+                key,
+                outcome["completed_turns"],
+                outcome["end_status"],
+                _pack_counts(outcome["player_scores"]),
+                outcome["cycle_start"],
+                outcome["cycle_length"],
+                _pack_positions(outcome["ending_positions"]),
+                now,
+            )
+            for key, outcome in items
+        ]
+        keys = {row[0] for row in rows}
+        with self._connection:
+            ## -- only keys not already cached add entries, replaced ones do not
+            num_new = len(keys) - self._count_keys(keys)
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        self._num_entries += num_new
+
+        if self._num_entries > self.max_entries:
+            self._evict()
+
+    def _count_keys(self, keys: set[DealKey]) -> int:
+        """Number of `keys` already in the cache."""
+        keys = list(keys)
+        count: int = 0
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            chunk = keys[start : start + _LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            count += self._connection.execute(
+                f"SELECT COUNT(*) FROM outcomes WHERE key IN ({placeholders})", chunk
+            ).fetchone()[0]
+        return count
+
+    def _evict(self) -> None:
+        ## -- recount first, since other processes may be writing to the same file
+        self._num_entries = self._connection.execute(
+            "SELECT COUNT(*) FROM outcomes"
+        ).fetchone()[0]
+        excess = self._num_entries - self.max_entries
+        if excess <= 0:
+            return
+
+        num_evicted = excess + int(self.max_entries * _EVICTION_FRACTION)
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM outcomes WHERE key IN"
+                " (SELECT key FROM outcomes ORDER BY last_used LIMIT ?)",
+                (num_evicted,),
+            )
+        self._num_entries = max(self._num_entries - num_evicted, 0)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "OutcomeCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
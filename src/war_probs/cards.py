@@ -120,19 +120,71 @@ def get_suit(suit: SuitType) -> list[Card]:
 ## ------------------------------------------------- ##
 
 
-def load_cards(shuffle: bool = True) -> list[Card]:
-    cards: list[Card] = []
+## -- numbered cards are immutable, so they are created once and shared by every deck
+_ORDERED_DECK: list[Card] = [
+    Card(rank=rank.value, suit=suit.value, value=value.value)
+    for rank, value in zip(Rank, Value)
+    for suit in Suit
+]
+
+
+def load_cards(shuffle: bool = True, num_decks: int = 1) -> list[Card]:
+    assert num_decks > 0, f"Shoe must hold at least 1 deck, got '{num_decks}'."
 
-    ## -- create numbered cards
-    for rank, value in zip(Rank, Value):
-        for suit in Suit:
-            cards.append(Card(rank=rank.value, suit=suit.value, value=value.value))
+    ## -- `num_decks` copies of each card for a multi-deck shoe
+    cards = _ORDERED_DECK * num_decks
 
     ## -- qa check !!!
-    assert len(cards) == DECK_LENGTH
+    assert len(cards) == DECK_LENGTH * num_decks
 
     ## -- shuffle step
     if shuffle:
         cards = random.sample(cards, k=len(cards))
 
     return cards
+
+
+## ------------------------------------------------- ##
+## ---- COMPACT INTEGER ENCODING OF PLAYING CARDS -- ##
+## ---- E.G., CARD CODES 0-51 FOR ARRAY ENGINES ---- ##
+## ------------------------------------------------- ##
+
+CardCode = int
+
+## -- codes follow the unshuffled deck order, i.e., code = rank_index * 4 + suit_index
+_CARDS_BY_CODE: list[Card] = load_cards(shuffle=False)
+
+_CODES_BY_CARD: dict[Card, CardCode] = {
+    card: code for code, card in enumerate(_CARDS_BY_CODE)
+}
+
+## -- lookup table from card code to card value
+CARD_VALUES: tuple[int, ...] = tuple(card.value for card in _CARDS_BY_CODE)
+
+
+def encode_card(card: Card) -> CardCode:
+    return _CODES_BY_CARD[card]
+
+
+def decode_card(code: CardCode) -> Card:
+    return _CARDS_BY_CODE[code]
+
+
+def encode_cards(cards: list[Card]) -> list[CardCode]:
+    return [_CODES_BY_CARD[card] for card in cards]
+
+
+def decode_cards(codes) -> list[Card]:
+    return [_CARDS_BY_CODE[code] for code in codes]
+
+
+def load_codes(shuffle: bool = True, num_decks: int = 1) -> list[CardCode]:
+    """
+    Card codes of a deck, without building cards. Shuffles draw from `random` exactly as
+    `load_cards` does, so the same random state deals the same cards either way.
+    """
+    assert num_decks > 0, f"Shoe must hold at least 1 deck, got '{num_decks}'."
+    codes = list(range(DECK_LENGTH)) * num_decks
+    if shuffle:
+        codes = random.sample(codes, k=len(codes))
+    return codes
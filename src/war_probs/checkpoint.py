@@ -0,0 +1,246 @@
+"""
+Checkpointed, resumable simulation runs.
+
+A run streams shard summaries into a Parquet dataset, as `war_probs.sink.write_simulations`
+does, and writes `checkpoint.json` into the same directory every time a part file is
+flushed. The checkpoint records the run settings, the random stream position, the
+completed shard ids, the part files written so far and the partial outcome tally.
+
+Every shard deals from its own stream, spawned from the run seed and shard index (see
+`war_probs.runner.shard_rng`), so the stream position is just the next shard to play.
+Part files always hold whole shards and are cut at the same rows whether or not a run
+was interrupted, so a resumed run produces exactly the files and tally of an
+uninterrupted one. Usage:
+
+    python -m war_probs.checkpoint run results/sweep-42 50000000 --seed 42
+    python -m war_probs.checkpoint resume results/sweep-42
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TypedDict
+
+from war_probs.runner import DEFAULT_SHARD_SIZE, iter_shards, plan_shards, resolve_seed
+from war_probs.sink import DEFAULT_ROWS_PER_FILE, ParquetResultSink
+from war_probs.stats import OutcomeTally, OutcomeTallyState, TurnCountSummary
+
+CHECKPOINT_FILENAME: str = "checkpoint.json"
+_CHECKPOINT_VERSION: int = 1
+
+
+class RunSettings(TypedDict):
+    n: int
+    seed: int
+    max_turns: int
+    battle_prize_card_reward: int
+    shard_size: int
+    include_deals: bool
+    rows_per_file: int
+
+
+class Checkpoint(TypedDict):
+    version: int
+    updated: str
+    settings: RunSettings
+    ## -- shard streams are spawned from the seed, so this is the position of the run's rng
+    next_shard: int
+    completed_shards: list[int]
+    part_files: list[str]
+    tally: OutcomeTallyState
+    complete: bool
+
+
+class CheckpointedRunResult(TypedDict):
+    directory: Path
+    settings: RunSettings
+    num_games: int
+    end_status_counts: dict[str, int]
+    player_wins: list[int]
+    turns: TurnCountSummary | None
+
+
+def load_checkpoint(directory: str | Path) -> Checkpoint:
+    return json.loads((Path(directory) / CHECKPOINT_FILENAME).read_text())
+
+
+def _save_checkpoint(directory: Path, checkpoint: Checkpoint) -> None:
+    """Write to a temporary file first, so an interrupted write never loses the checkpoint."""
+    checkpoint["updated"] = datetime.now(timezone.utc).isoformat()
+    temporary_path = directory / f"{CHECKPOINT_FILENAME}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, directory / CHECKPOINT_FILENAME)
+
+
+def _result(directory: Path, checkpoint: Checkpoint) -> CheckpointedRunResult:
+    tally = OutcomeTally.from_state(checkpoint["tally"])
+    return CheckpointedRunResult(
+        directory=directory,
+        settings=checkpoint["settings"],
+        num_games=tally.num_games,
+        end_status_counts=tally.end_status_summary(),
+        player_wins=tally.player_wins,
+        turns=tally.turn_counts.summary() if tally.turn_counts.count > 0 else None,
+    )
+
+
+def _continue_run(
+    directory: Path, checkpoint: Checkpoint, workers: int | None
+) -> CheckpointedRunResult:
+    settings = checkpoint["settings"]
+    shards = plan_shards(
+        settings["n"],
+        seed=settings["seed"],
+        max_turns=settings["max_turns"],
+        battle_prize_card_reward=settings["battle_prize_card_reward"],
+        shard_size=settings["shard_size"],
+        include_deals=settings["include_deals"],
+    )
+    tally = OutcomeTally.from_state(checkpoint["tally"])
+
+    ## -- shards buffered in the sink, not yet covered by the checkpoint
+    buffered_tally = OutcomeTally()
+    buffered_shards: list[int] = []
+
+    def commit(part_path: Path | None) -> None:
+        nonlocal buffered_tally
+        if part_path is None:
+            return
+        tally.merge(buffered_tally)
+        checkpoint["completed_shards"].extend(buffered_shards)
+        checkpoint["next_shard"] += len(buffered_shards)
+        checkpoint["part_files"].append(part_path.name)
+        checkpoint["tally"] = tally.to_state()
+        _save_checkpoint(directory, checkpoint)
+        buffered_tally = OutcomeTally()
+        buffered_shards.clear()
+
+    sink = ParquetResultSink(
+        directory,
+        include_deals=settings["include_deals"],
+        rows_per_file=settings["rows_per_file"],
+    )
+    for summary in iter_shards(shards[checkpoint["next_shard"] :], workers=workers):
+        buffered_tally.add(summary)
+        buffered_shards.append(checkpoint["next_shard"] + len(buffered_shards))
+        commit(sink.write(summary))
+    commit(sink.close())
+
+    checkpoint["complete"] = True
+    _save_checkpoint(directory, checkpoint)
+    return _result(directory, checkpoint)
+
+
+def run_checkpointed(
+    directory: str | Path,
+    n: int,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    include_deals: bool = False,
+    rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+) -> CheckpointedRunResult:
+    """
+    Simulate `n` two-player games into a new Parquet dataset in `directory`, checkpointing
+    after every part file. An interrupted run is continued with `resume`.
+    """
+    directory = Path(directory)
+    assert not (
+        directory / CHECKPOINT_FILENAME
+    ).exists(), f"'{directory}' already holds a run, use `resume` to continue it."
+    assert not list(
+        directory.glob("part-*.parquet")
+    ), f"'{directory}' already holds part files from another run."
+    directory.mkdir(parents=True, exist_ok=True)
+
+    checkpoint = Checkpoint(
+        version=_CHECKPOINT_VERSION,
+        updated="",
+        settings=RunSettings(
+            n=n,
+            seed=resolve_seed(seed),
+            max_turns=max_turns,
+            battle_prize_card_reward=battle_prize_card_reward,
+            shard_size=shard_size,
+            include_deals=include_deals,
+            rows_per_file=rows_per_file,
+        ),
+        next_shard=0,
+        completed_shards=[],
+        part_files=[],
+        tally=OutcomeTally().to_state(),
+        complete=False,
+    )
+    _save_checkpoint(directory, checkpoint)
+    return _continue_run(directory, checkpoint, workers)
+
+
+def resume(directory: str | Path, workers: int | None = None) -> CheckpointedRunResult:
+    """Continue a run from its last checkpoint, discarding part files written after it."""
+    directory = Path(directory)
+    checkpoint = load_checkpoint(directory)
+    assert (
+        checkpoint["version"] == _CHECKPOINT_VERSION
+    ), f"Unsupported checkpoint version '{checkpoint['version']}'."
+    if checkpoint["complete"]:
+        return _result(directory, checkpoint)
+
+    committed = set(checkpoint["part_files"])
+    for part_path in directory.glob("part-*.parquet"):
+        if part_path.name not in committed:
+            part_path.unlink()
+
+    return _continue_run(directory, checkpoint, workers)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m war_probs.checkpoint")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Start a checkpointed run.")
+    run_parser.add_argument("directory")
+    run_parser.add_argument("n", type=int)
+    run_parser.add_argument("--seed", type=int)
+    run_parser.add_argument("--workers", type=int)
+    run_parser.add_argument("--max-turns", type=int, default=5_000)
+    run_parser.add_argument("--battle-prize-card-reward", type=int, default=3)
+    run_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    run_parser.add_argument("--include-deals", action="store_true")
+    run_parser.add_argument("--rows-per-file", type=int, default=DEFAULT_ROWS_PER_FILE)
+
+    resume_parser = commands.add_parser("resume", help="Continue a run from its checkpoint.")
+    resume_parser.add_argument("directory")
+    resume_parser.add_argument("--workers", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        result = run_checkpointed(
+            args.directory,
+            args.n,
+            workers=args.workers,
+            seed=args.seed,
+            max_turns=args.max_turns,
+            battle_prize_card_reward=args.battle_prize_card_reward,
+            shard_size=args.shard_size,
+            include_deals=args.include_deals,
+            rows_per_file=args.rows_per_file,
+        )
+    else:
+        result = resume(args.directory, workers=args.workers)
+
+    print(f"> Simulated {result['num_games']:,} games into {result['directory']}")
+    print(f"> End statuses: {result['end_status_counts']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
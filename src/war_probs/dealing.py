@@ -0,0 +1,121 @@
+"""
+Bulk shuffling and dealing of card codes.
+
+Decks are dealt as `(n_games, deck_length)` arrays of card codes (see
+`war_probs.cards.encode_card`) from a seeded NumPy `Generator`, one row per game, and
+split into hands the same way `war_probs.game.distribute_cards_to_players` splits a
+list of cards. Rows plug straight into `Game(codes=...)` or the lockstep batch engine,
+so no `Card` tuples are built unless a game result asks for them.
+
+Decks can also be dealt conditionally on a split, i.e., how many cards of given groups,
+say the aces, player 0 holds. Biased and stratified samplers draw the split first and
+then deal uniformly among the decks with that split.
+"""
+
+import math
+from collections.abc import Iterator
+
+import numpy as np
+
+from war_probs.cards import DECK_LENGTH
+
+
+def deal_decks(n_games: int, rng: np.random.Generator, num_decks: int = 1) -> np.ndarray:
+    """Shuffled decks of card codes, one row per game, shuffling every row in one call."""
+    assert num_decks > 0, f"Shoe must hold at least 1 deck, got '{num_decks}'."
+    ordered = np.tile(np.arange(DECK_LENGTH, dtype=np.uint8), (n_games, num_decks))
+    return rng.permuted(ordered, axis=1)
+
+
+def hand_lengths(deck_length: int, num_players: int = 2) -> list[int]:
+    """Cards dealt to each player, earlier players take any extra cards."""
+    assert (
+        1 < num_players <= deck_length
+    ), f"Cannot deal {deck_length} cards to '{num_players}' players."
+    cards_per_player, remaining_cards = divmod(deck_length, num_players)
+    return [
+        cards_per_player + 1 if player < remaining_cards else cards_per_player
+        for player in range(num_players)
+    ]
+
+
+def split_hands(decks: np.ndarray, num_players: int = 2) -> list[np.ndarray]:
+    """
+    Split dealt decks into each player's hand, as `(n_games, hand_length)` views of
+    `decks`, with the first card of each row at the front of the hand.
+    """
+    hands: list[np.ndarray] = []
+    start: int = 0
+    for length in hand_lengths(decks.shape[1], num_players):
+        hands.append(decks[:, start : start + length])
+        start += length
+    return hands
+
+
+def iter_deals(
+    n_games: int,
+    rng: np.random.Generator,
+    num_decks: int = 1,
+    chunk_size: int = 10_000,
+) -> Iterator[list[int]]:
+    """
+    Deals for one game at a time, as lists of card codes for `Game(codes=...)`, shuffled
+    in bulk `chunk_size` games at a time.
+    """
+    for start in range(0, n_games, chunk_size):
+        yield from deal_decks(min(chunk_size, n_games - start), rng, num_decks).tolist()
+
+
+def split_probability(held: np.ndarray, group_sizes: list[int]) -> np.ndarray:
+    """
+    Probability of a uniformly shuffled deck dealing player 0 exactly `held[..., group]`
+    cards from each group of `group_sizes` cards, the rest of the hand from other cards.
+    """
+    held = np.asarray(held)
+    hand_length = hand_lengths(DECK_LENGTH)[0]
+    num_rest = DECK_LENGTH - sum(group_sizes)
+    held_rest = hand_length - held.sum(axis=-1)
+
+    ## -- ways of choosing `k` of `n` cards, none for impossible splits
+    comb = np.vectorize(lambda n, k: math.comb(n, k) if 0 <= k <= n else 0)
+    ways = comb(num_rest, held_rest)
+    for group, size in enumerate(group_sizes):
+        ways = ways * comb(size, held[..., group])
+    return ways / math.comb(DECK_LENGTH, hand_length)
+
+
+def deal_with_split(
+    held: np.ndarray, groups: list[np.ndarray], rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Two-player decks of card codes, uniformly shuffled among deals giving player 0
+    exactly `held[game, group]` cards from each group of card codes in `groups`.
+    """
+    n_games = held.shape[0]
+    hand_length = hand_lengths(DECK_LENGTH)[0]
+    rest = np.setdiff1d(np.arange(DECK_LENGTH), np.concatenate(groups))
+    groups = [*groups, rest]
+    held = np.column_stack([held, hand_length - held.sum(axis=1)])
+    assert np.all((held >= 0) & (held <= [len(group) for group in groups])), (
+        "Every split must deal player 0 between none and all cards of each group."
+    )
+
+    ## -- player 0 takes the first `held` cards of every shuffled group
+    cards = np.concatenate(
+        [
+            rng.permuted(np.tile(np.asarray(group, dtype=np.uint8), (n_games, 1)), axis=1)
+            for group in groups
+        ],
+        axis=1,
+    )
+    to_second_player = np.concatenate(
+        [
+            np.arange(len(group)) >= held[:, [group_num]]
+            for group_num, group in enumerate(groups)
+        ],
+        axis=1,
+    )
+
+    ## -- player 0's cards sort to the front, in random order within each hand
+    order = np.argsort(to_second_player + rng.random(cards.shape), axis=1)
+    return np.take_along_axis(cards, order, axis=1)
@@ -1,47 +1,63 @@
-import matplotlib.pyplot as plt
-import numpy as np
+from typing import TYPE_CHECKING
+
+from war_probs.stats import TurnCountAccumulator
+
+## -- matplotlib is imported when a plot is drawn, see `war_probs.metrics`
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 
 def turn_count_distribution_histogram(
-    turn_counts, bins=50, figsize=(14, 8)
-) -> plt.Figure:  # type: ignore
+    turn_counts, bins=50, figsize=(14, 8), verbose=True
+) -> "plt.Figure":  # type: ignore
     """
     Create a histogram showing the distribution of turn counts across simulations.
 
     Parameters:
     -----------
-    turn_counts : list or np.array
-        Array of turn counts from each simulation
+    turn_counts : list, np.array or TurnCountAccumulator
+        Turn counts from each simulation, or an accumulator already holding them
     bins : int or sequence
         Number of bins for the histogram (default=50)
     figsize : tuple
         Figure size as (width, height) in inches
+    verbose : bool
+        Print statistics to console as well (default=True)
 
     Returns:
     --------
     fig : matplotlib.figure.Figure
         The figure object containing the histogram
     """
-    # Convert to numpy array for easier statistics
-    turn_counts = np.array(turn_counts)
+    import matplotlib.pyplot as plt
+
+    # Summarize turn counts without keeping every game in memory
+    if isinstance(turn_counts, TurnCountAccumulator):
+        accumulator = turn_counts
+    else:
+        accumulator = TurnCountAccumulator.from_values(turn_counts)
 
     # Calculate statistics
-    mean = np.mean(turn_counts)
-    median = np.median(turn_counts)
-    std = np.std(turn_counts)
-    q1 = np.percentile(turn_counts, 25)
-    q3 = np.percentile(turn_counts, 75)
-    minimum = np.min(turn_counts)
-    maximum = np.max(turn_counts)
-    iqr = q3 - q1
+    stats = accumulator.summary()
+    num_games = stats["count"]
+    mean = stats["mean"]
+    median = stats["median"]
+    std = stats["std"]
+    q1 = stats["q1"]
+    q3 = stats["q3"]
+    minimum = stats["min"]
+    maximum = stats["max"]
+    iqr = stats["iqr"]
 
     # Create the figure
     fig, ax = plt.subplots(figsize=figsize)
 
-    # Create histogram
+    # Create histogram, weighting each distinct turn count by its number of games
+    distinct_turn_counts, games_per_turn_count = accumulator.distinct_values()
     n, bins_edges, patches = ax.hist(
-        turn_counts,
+        distinct_turn_counts,
         bins=bins,
+        weights=games_per_turn_count,
         color="steelblue",
         edgecolor="black",
         alpha=0.7,
@@ -78,7 +94,7 @@ def turn_count_distribution_histogram(
 
     # Add text box with statistics
     stats_text = (
-        f"Statistics (n={len(turn_counts):,} games):\n"
+        f"Statistics (n={num_games:,} games):\n"
         f"Mean: {mean:.2f}\n"
         f"Median: {median:.2f}\n"
         f"Std Dev: {std:.2f}\n"
@@ -104,9 +120,12 @@ def turn_count_distribution_histogram(
     fig.tight_layout()
 
     # Print statistics to console as well
+    if not verbose:
+        return fig
+
     print("Turn Count Distribution Statistics:")
     print("=" * 40)
-    print(f"Number of simulations: {len(turn_counts):,}")
+    print(f"Number of simulations: {num_games:,}")
     print(f"Mean turns: {mean:.2f}")
     print(f"Median turns: {median:.2f}")
     print(f"Standard deviation: {std:.2f}")
@@ -0,0 +1,314 @@
+"""
+Low-level game representation for the turn loop.
+
+Cards are integer codes (see `war_probs.cards.encode_card`) whose values come from a
+lookup table, and each player's hand is a fixed-capacity ring buffer inside one shared
+byte array. `Card` tuples are only built when converting to and from this representation.
+"""
+
+from array import array
+
+from war_probs.cards import CARD_VALUES, Card, CardCode, decode_cards, encode_cards
+
+PlayerNum = int
+
+## -- (winning player, wars fought, cards awarded to the winner, players forfeiting)
+TurnSummary = tuple[PlayerNum, int, int, int]
+
+
+class RingHands:
+    """
+    Every player's hand as a ring buffer of card codes, `capacity` slots per player.
+    `active` lists the players still holding cards, in player order. Players never get
+    cards back once their hand is empty, so it only shrinks, and turns update it in place
+    of rescanning every hand.
+    """
+
+    __slots__ = ("num_players", "capacity", "slots", "heads", "sizes", "active")
+
+    def __init__(self, hands: list[list[CardCode]], capacity: int | None = None) -> None:
+        self.num_players = len(hands)
+        self.capacity = capacity or sum(len(hand) for hand in hands)
+        self.slots = array("B", bytes(self.capacity * self.num_players))
+        self.heads = [0] * self.num_players
+        self.sizes = [len(hand) for hand in hands]
+        self.active = [player_num for player_num, hand in enumerate(hands) if hand]
+
+        for player_num, hand in enumerate(hands):
+            start = player_num * self.capacity
+            self.slots[start : start + len(hand)] = array("B", hand)
+
+    @classmethod
+    def from_cards(cls, players_hands) -> "RingHands":
+        return cls([encode_cards(list(hand)) for hand in players_hands])
+
+    def hand(self, player_num: PlayerNum) -> list[CardCode]:
+        start = player_num * self.capacity
+        head = start + self.heads[player_num]
+        end = head + self.sizes[player_num]
+        stop = start + self.capacity
+        if end <= stop:
+            return self.slots[head:end].tolist()
+        return self.slots[head:stop].tolist() + self.slots[start : end - self.capacity].tolist()
+
+    def to_lists(self) -> list[list[CardCode]]:
+        return [self.hand(player_num) for player_num in range(self.num_players)]
+
+    def to_cards(self) -> list[list[Card]]:
+        return [decode_cards(hand) for hand in self.to_lists()]
+
+    def front_cards(self) -> list[CardCode]:
+        """Next card each player will play, or -1 for an empty hand."""
+        return [
+            self.slots[player_num * self.capacity + head] if size > 0 else -1
+            for player_num, (head, size) in enumerate(zip(self.heads, self.sizes))
+        ]
+
+    def game_state(self) -> list[bool]:
+        return [size > 0 for size in self.sizes]
+
+    def copy(self) -> "RingHands":
+        clone = RingHands.__new__(RingHands)
+        clone.num_players = self.num_players
+        clone.capacity = self.capacity
+        clone.slots = array("B", self.slots)
+        clone.heads = self.heads.copy()
+        clone.sizes = self.sizes.copy()
+        clone.active = self.active.copy()
+        return clone
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RingHands):
+            return NotImplemented
+        return self.sizes == other.sizes and self.to_lists() == other.to_lists()
+
+    def __repr__(self) -> str:
+        return f"RingHands({self.to_lists()})"
+
+
+def deal_encoded_hands(codes: list[CardCode], num_players: int = 2) -> RingHands:
+    """Same split as `distribute_cards_to_players`, earlier players take any extra cards."""
+    cards_per_player, remaining_cards = divmod(len(codes), num_players)
+
+    hands: list[list[CardCode]] = []
+    card_index: int = 0
+    for player in range(num_players):
+        num_cards = cards_per_player + 1 if player < remaining_cards else cards_per_player
+        hands.append(codes[card_index : card_index + num_cards])
+        card_index += num_cards
+
+    return RingHands(hands)
+
+
+def _push_cards(hands: RingHands, player_num: PlayerNum, codes: list[CardCode]) -> None:
+    capacity = hands.capacity
+    start = player_num * capacity
+    tail = (hands.heads[player_num] + hands.sizes[player_num]) % capacity
+    slots = hands.slots
+    for code in codes:
+        slots[start + tail] = code
+        tail += 1
+        if tail == capacity:
+            tail = 0
+    hands.sizes[player_num] += len(codes)
+
+
+def _drop_empty_hands(hands: RingHands) -> None:
+    sizes = hands.sizes
+    hands.active = [player_num for player_num in hands.active if sizes[player_num] > 0]
+
+
+def _play_turn_encoded_two_players(
+    hands: RingHands,
+    battle_prize_card_reward: int = 3,
+    card_values: tuple[int, ...] = CARD_VALUES,
+) -> TurnSummary:
+    """Same turn as `play_turn_encoded_general` with exactly two players left in the game."""
+    slots = hands.slots
+    capacity = hands.capacity
+    heads = hands.heads
+    sizes = hands.sizes
+    first_player, second_player = hands.active
+    first_offset = first_player * capacity
+    second_offset = second_player * capacity
+    first_head = heads[first_player]
+    second_head = heads[second_player]
+    first_size = sizes[first_player]
+    second_size = sizes[second_player]
+
+    wars: int = 0
+    prize_cards: list[CardCode] = []
+
+    while True:
+        first_card = slots[first_offset + first_head]
+        first_head = first_head + 1 if first_head + 1 < capacity else 0
+        second_card = slots[second_offset + second_head]
+        second_head = second_head + 1 if second_head + 1 < capacity else 0
+        first_size -= 1
+        second_size -= 1
+
+        first_value = card_values[first_card]
+        second_value = card_values[second_card]
+        if first_value != second_value:
+            heads[first_player] = first_head
+            heads[second_player] = second_head
+            sizes[first_player] = first_size
+            sizes[second_player] = second_size
+
+            if first_value > second_value:
+                winning_player_num, losing_size = first_player, second_size
+            else:
+                winning_player_num, losing_size = second_player, first_size
+            if losing_size == 0:
+                hands.active = [winning_player_num]
+
+            if prize_cards:
+                prize_cards[:0] = (first_card, second_card)
+                _push_cards(hands, winning_player_num, prize_cards)
+                return winning_player_num, wars, len(prize_cards), 0
+
+            ## -- no war, so just two cards go to the back of the winner's hand
+            tail = heads[winning_player_num] + sizes[winning_player_num]
+            offset = winning_player_num * capacity
+            slots[offset + tail % capacity] = first_card
+            slots[offset + (tail + 1) % capacity] = second_card
+            sizes[winning_player_num] += 2
+            return winning_player_num, 0, 2, 0
+
+        ## -- !! war !!
+        wars += 1
+        prize_cards.append(first_card)
+        prize_cards.append(second_card)
+
+        first_forfeits = first_size <= battle_prize_card_reward
+        second_forfeits = second_size <= battle_prize_card_reward
+        if first_forfeits or second_forfeits:
+            heads[first_player] = first_head
+            heads[second_player] = second_head
+            sizes[first_player] = first_size
+            sizes[second_player] = second_size
+
+            ## -- players without enough cards for war forfeit remaining cards
+            forfeiting = ((first_player, first_forfeits), (second_player, second_forfeits))
+            for player_num, forfeits in forfeiting:
+                if forfeits:
+                    prize_cards.extend(hands.hand(player_num))
+                    heads[player_num] = 0
+                    sizes[player_num] = 0
+
+            if first_forfeits and second_forfeits:
+                hands.active = []
+                raise ValueError("No players remaining battle. Game ends in tie.")
+            last_standing_player = second_player if first_forfeits else first_player
+            hands.active = [last_standing_player]
+            _push_cards(hands, last_standing_player, prize_cards)
+            return last_standing_player, wars, len(prize_cards), 1
+
+        for _ in range(battle_prize_card_reward):
+            prize_cards.append(slots[first_offset + first_head])
+            first_head = first_head + 1 if first_head + 1 < capacity else 0
+        for _ in range(battle_prize_card_reward):
+            prize_cards.append(slots[second_offset + second_head])
+            second_head = second_head + 1 if second_head + 1 < capacity else 0
+        first_size -= battle_prize_card_reward
+        second_size -= battle_prize_card_reward
+
+
+def play_turn_encoded(
+    hands: RingHands,
+    battle_prize_card_reward: int = 3,
+    card_values: tuple[int, ...] = CARD_VALUES,
+) -> TurnSummary:
+    """Play a single turn in place, following the same rules as `war_probs.game.play_turn`."""
+    ## -- turns between two players, including the end of larger games, take a dedicated path
+    if len(hands.active) == 2:
+        return _play_turn_encoded_two_players(hands, battle_prize_card_reward, card_values)
+    return play_turn_encoded_general(hands, battle_prize_card_reward, card_values)
+
+
+def play_turn_encoded_general(
+    hands: RingHands,
+    battle_prize_card_reward: int = 3,
+    card_values: tuple[int, ...] = CARD_VALUES,
+) -> TurnSummary:
+    """
+    Play a single turn in place for any number of players. Tied players are tracked by
+    player number, and the highest card is found in the same pass that draws the
+    cards, so no ranking is built.
+    """
+    slots = hands.slots
+    heads = hands.heads
+    sizes = hands.sizes
+    capacity = hands.capacity
+
+    ## -- only players still in the game take part, so eliminated players cost nothing
+    players_in_battle = hands.active
+
+    wars: int = 0
+    forfeits: int = 0
+    emptied_hands: bool = False
+    prize_cards: list[CardCode] = []
+
+    while True:
+        if wars > 0:
+            for player_num in players_in_battle:
+                start = player_num * capacity
+                for _ in range(battle_prize_card_reward):
+                    head = heads[player_num]
+                    prize_cards.append(slots[start + head])
+                    heads[player_num] = head + 1 if head + 1 < capacity else 0
+                sizes[player_num] -= battle_prize_card_reward
+
+        ## -- get next cards from each player, keeping track of the highest value
+        played_cards: list[CardCode] = []
+        best_value: int = -1
+        best_players: list[PlayerNum] = []
+        for player_num in players_in_battle:
+            head = heads[player_num]
+            code = slots[player_num * capacity + head]
+            heads[player_num] = head + 1 if head + 1 < capacity else 0
+            sizes[player_num] -= 1
+            if sizes[player_num] == 0:
+                emptied_hands = True
+            played_cards.append(code)
+
+            value = card_values[code]
+            if value > best_value:
+                best_value = value
+                best_players = [player_num]
+            elif value == best_value:
+                best_players.append(player_num)
+
+        if len(best_players) == 1:
+            ## -- easy case, we have a single winner
+            winning_player_num = best_players[0]
+            if prize_cards:
+                played_cards.extend(prize_cards)
+            _push_cards(hands, winning_player_num, played_cards)
+            if emptied_hands or forfeits:
+                _drop_empty_hands(hands)
+            return winning_player_num, wars, len(played_cards), forfeits
+
+        ## -- !! war !!
+        wars += 1
+        prize_cards.extend(played_cards)
+
+        ## -- if players do not have enough cards for war, they forfeit remaining cards
+        players_in_battle = []
+        for player_num in best_players:
+            if sizes[player_num] <= battle_prize_card_reward:
+                prize_cards.extend(hands.hand(player_num))
+                heads[player_num] = 0
+                sizes[player_num] = 0
+                forfeits += 1
+            else:
+                players_in_battle.append(player_num)
+
+        if len(players_in_battle) == 0:
+            _drop_empty_hands(hands)
+            raise ValueError("No players remaining battle. Game ends in tie.")
+        elif len(players_in_battle) == 1:
+            last_standing_player = players_in_battle[0]
+            _push_cards(hands, last_standing_player, prize_cards)
+            _drop_empty_hands(hands)
+            return last_standing_player, wars, len(prize_cards), forfeits
@@ -0,0 +1,215 @@
+"""
+Exact analysis of war for reduced decks of `num_ranks` ranks with `copies` of each.
+
+Suits never affect play, so every shuffle with the same sequence of card values plays
+out identically, and each distinct value sequence stands for the same number of
+shuffles. Enumerating each value sequence once therefore gives exact win, cycle and
+turn count distributions. Every game either ends or revisits a state, since the number
+of states is finite, so cycle detection replaces the `max_turns` cut-off.
+
+Swapping the two players' hands is not a symmetry of these rules, because the winner
+stacks the played cards in player order, so both orderings of every deal are played.
+"""
+
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from typing import NamedTuple, TypedDict
+
+from war_probs.encoded import deal_encoded_hands, play_turn_encoded
+
+## -- enumeration is split into roughly this many chunks per worker
+_CHUNKS_PER_WORKER: int = 8
+
+
+class ExactCounts(TypedDict):
+    num_deals: int
+    player_wins: list[int]
+    cycles: int
+    ties: int
+    turn_counts: dict[int, int]
+
+
+class ExactDistribution(TypedDict):
+    num_ranks: int
+    copies: int
+    num_deals: int
+    player_wins: list[int]
+    cycles: int
+    ties: int
+    turn_counts: dict[int, int]
+    win_probabilities: list[Fraction]
+    cycle_probability: Fraction
+    tie_probability: Fraction
+
+
+class _Chunk(NamedTuple):
+    num_ranks: int
+    copies: int
+    start: int
+    stop: int
+    battle_prize_card_reward: int
+
+
+def count_deals(num_ranks: int, copies: int) -> int:
+    """Number of distinct value sequences, i.e., the multinomial coefficient."""
+    return math.factorial(num_ranks * copies) // math.factorial(copies) ** num_ranks
+
+
+def _unrank_deal(index: int, num_ranks: int, copies: int) -> list[int]:
+    """Value sequence at position `index` of the lexicographic enumeration."""
+    remaining = [copies] * num_ranks
+    num_cards = num_ranks * copies
+    deal: list[int] = []
+    for position in range(num_cards):
+        for rank in range(num_ranks):
+            if remaining[rank] == 0:
+                continue
+            remaining[rank] -= 1
+            ## -- sequences that start with this rank at this position
+            num_suffixes = math.factorial(num_cards - position - 1)
+            for count in remaining:
+                num_suffixes //= math.factorial(count)
+            if index < num_suffixes:
+                deal.append(rank)
+                break
+            index -= num_suffixes
+            remaining[rank] += 1
+    return deal
+
+
+def _next_deal(deal: list[int]) -> bool:
+    """Advance to the next value sequence in lexicographic order, in place."""
+    pivot = len(deal) - 2
+    while pivot >= 0 and deal[pivot] >= deal[pivot + 1]:
+        pivot -= 1
+    if pivot < 0:
+        return False
+
+    successor = len(deal) - 1
+    while deal[successor] <= deal[pivot]:
+        successor -= 1
+    deal[pivot], deal[successor] = deal[successor], deal[pivot]
+    deal[pivot + 1 :] = reversed(deal[pivot + 1 :])
+    return True
+
+
+def play_to_completion(
+    deal: list[int], card_values: tuple[int, ...], battle_prize_card_reward: int = 3
+) -> tuple[str, int, int | None]:
+    """
+    Play a two-player deal of card codes until it ends or repeats a state.
+    Returns the end status ("winner", "cycle" or "tie"), the turns played until then
+    and the winning player.
+    """
+    hands = deal_encoded_hands(deal)
+
+    ## -- brent's algorithm, as in `Game.play`
+    snapshot = hands.copy()
+    snapshot_power: int = 1
+    turns_since_snapshot: int = 1
+
+    num_turns: int = 0
+    while min(hands.sizes) > 0:
+        num_turns += 1
+        try:
+            play_turn_encoded(hands, battle_prize_card_reward, card_values)
+        except ValueError:
+            return "tie", num_turns, None
+
+        if hands == snapshot:
+            return "cycle", num_turns, None
+        if turns_since_snapshot == snapshot_power:
+            snapshot = hands.copy()
+            snapshot_power *= 2
+            turns_since_snapshot = 0
+        turns_since_snapshot += 1
+
+    return "winner", num_turns, hands.sizes.index(max(hands.sizes))
+
+
+def _enumerate_chunk(chunk: _Chunk) -> ExactCounts:
+    card_values = tuple(range(2, chunk.num_ranks + 2))
+    counts = ExactCounts(
+        num_deals=0, player_wins=[0, 0], cycles=0, ties=0, turn_counts={}
+    )
+    turn_counts: Counter[int] = Counter()
+
+    deal = _unrank_deal(chunk.start, chunk.num_ranks, chunk.copies)
+    for _ in range(chunk.stop - chunk.start):
+        status, num_turns, winner = play_to_completion(
+            deal, card_values, chunk.battle_prize_card_reward
+        )
+        counts["num_deals"] += 1
+        if status == "winner":
+            counts["player_wins"][winner] += 1  # type: ignore
+            turn_counts[num_turns] += 1
+        elif status == "cycle":
+            counts["cycles"] += 1
+        else:
+            counts["ties"] += 1
+        _next_deal(deal)
+
+    counts["turn_counts"] = dict(turn_counts)
+    return counts
+
+
+def merge_counts(parts: list[ExactCounts]) -> ExactCounts:
+    turn_counts: Counter[int] = Counter()
+    for part in parts:
+        turn_counts.update(part["turn_counts"])
+    return ExactCounts(
+        num_deals=sum(part["num_deals"] for part in parts),
+        player_wins=[sum(wins) for wins in zip(*(part["player_wins"] for part in parts))],
+        cycles=sum(part["cycles"] for part in parts),
+        ties=sum(part["ties"] for part in parts),
+        turn_counts=dict(sorted(turn_counts.items())),
+    )
+
+
+def exact_distribution(
+    num_ranks: int,
+    copies: int,
+    workers: int | None = None,
+    battle_prize_card_reward: int = 3,
+) -> ExactDistribution:
+    """
+    Enumerate every distinct two-player deal of a reduced deck across a process pool.
+    Each distinct value sequence is equally likely under a uniform shuffle, so the
+    probabilities are exact fractions of `num_deals`.
+    """
+    assert num_ranks > 1 and copies > 0, "Deck needs at least 2 ranks and 1 copy."
+    num_deals = count_deals(num_ranks, copies)
+    workers = workers or os.cpu_count() or 1
+
+    ## -- split the lexicographic enumeration into contiguous chunks
+    num_chunks = min(num_deals, workers * _CHUNKS_PER_WORKER)
+    bounds = [num_deals * chunk // num_chunks for chunk in range(num_chunks + 1)]
+    chunks = [
+        _Chunk(num_ranks, copies, start, stop, battle_prize_card_reward)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+    if workers == 1:
+        parts = [_enumerate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_enumerate_chunk, chunks))
+
+    counts = merge_counts(parts)
+    assert counts["num_deals"] == num_deals
+
+    return ExactDistribution(
+        num_ranks=num_ranks,
+        copies=copies,
+        num_deals=num_deals,
+        player_wins=counts["player_wins"],
+        cycles=counts["cycles"],
+        ties=counts["ties"],
+        turn_counts=counts["turn_counts"],
+        win_probabilities=[Fraction(wins, num_deals) for wins in counts["player_wins"]],
+        cycle_probability=Fraction(counts["cycles"], num_deals),
+        tie_probability=Fraction(counts["ties"], num_deals),
+    )
@@ -0,0 +1,51 @@
+"""
+Vectorized deal features for two-player games.
+
+Features are computed for a whole array of dealt decks at once (see
+`war_probs.dealing.deal_decks`), one column per feature and player: the count of every
+rank in the player's hand, the sum of its card values, and the position of its first
+ace, i.e., how many turns before it is played when no war intervenes. They are written
+next to game outcomes by `war_probs.sink` and queried with `war_probs.query`.
+"""
+
+import numpy as np
+import polars as pl
+
+from war_probs.cards import CARD_VALUES, Rank, Value
+from war_probs.dealing import split_hands
+
+## -- sorting part files by these keeps their parquet row group statistics selective
+CLUSTER_COLUMNS: tuple[str, ...] = ("ace_count_0", "king_count_0")
+
+
+def deal_features(decks: np.ndarray) -> dict[str, np.ndarray]:
+    """Feature columns for `(n_games, deck_length)` decks of card codes."""
+    values = np.asarray(CARD_VALUES, dtype=np.uint8)[decks]
+
+    features: dict[str, np.ndarray] = {}
+    value_sums: list[np.ndarray] = []
+    for player_num, hand in enumerate(split_hands(values, num_players=2)):
+        for rank, value in zip(Rank, Value):
+            features[f"{rank.value}_count_{player_num}"] = (hand == value.value).sum(
+                axis=1, dtype=np.uint8
+            )
+        value_sums.append(hand.sum(axis=1, dtype=np.int16))
+        features[f"value_sum_{player_num}"] = value_sums[-1]
+
+        ## -- -1 for hands without an ace
+        is_ace = hand == Value.ACE.value
+        features[f"first_ace_{player_num}"] = np.where(
+            is_ace.any(axis=1), is_ace.argmax(axis=1), -1
+        ).astype(np.int8)
+
+    features["value_sum_difference"] = value_sums[0] - value_sums[1]
+    return features
+
+
+def deal_feature_frame(decks: np.ndarray) -> pl.DataFrame:
+    """`deal_features` as a frame, with hands without an ace missing a first ace position."""
+    frame = pl.DataFrame(deal_features(decks))
+    return frame.with_columns(
+        pl.when(pl.col(name) >= 0).then(pl.col(name)).alias(name)
+        for name in ("first_ace_0", "first_ace_1")
+    )
@@ -1,10 +1,24 @@
-import math
 import time
 from collections import deque
-from typing import Deque, Literal, TypedDict
+from typing import TYPE_CHECKING, Deque, Literal, TypedDict
 from uuid import uuid4
 
-from war_probs.cards import DECK_LENGTH, Card, load_cards
+from war_probs.cache import CachedOutcome, OutcomeCache, deal_key
+from war_probs.cards import (
+    CARD_VALUES,
+    DECK_LENGTH,
+    Card,
+    CardCode,
+    decode_cards,
+    encode_cards,
+    load_codes,
+)
+from war_probs.encoded import RingHands, deal_encoded_hands, play_turn_encoded
+from war_probs.state import GameState
+
+if TYPE_CHECKING:
+    from war_probs.instrument import GameInstrumentation
+    from war_probs.trace import TurnTrace
 
 PlayerNum = int
 PrizeCards = list[Card]
@@ -24,8 +38,12 @@ def distribute_cards_to_players(
         num_players > 1
     ), f"Game must have at least 2 players. Specified number of players '{num_players}' is not valid."
     assert (
-        len(cards) == DECK_LENGTH
-    ), f"Card deck must have exactly {DECK_LENGTH} cards, provided deck has {len(cards)} cards."
+        len(cards) > 0 and len(cards) % DECK_LENGTH == 0
+    ), f"Card deck must be made of whole {DECK_LENGTH} card decks, provided deck has {len(cards)} cards."
+    assert num_players <= len(cards), (
+        f"Every player needs at least 1 card. {len(cards)} cards cannot be dealt to"
+        f" {num_players} players."
+    )
 
     cards_per_player = len(cards) // num_players
     remaining_cards = len(cards) % num_players
@@ -99,8 +117,65 @@ def get_players_eligible_for_battle(
     return [len(hand) >= required_num_cards for hand in players_hands]
 
 
+def _play_turn_two_players(
+    players_hands: PlayersHandDeques, battle_prize_card_reward: int = 3
+) -> PlayersHandDeques:
+    """Same turn as `play_turn_general` with both players in battle, without rankings."""
+    first_hand, second_hand = players_hands
+    prize_cards: list[Card] = []
+
+    while True:
+        first_card = first_hand.popleft()
+        second_card = second_hand.popleft()
+
+        if first_card.value != second_card.value:
+            winning_hand = first_hand if first_card.value > second_card.value else second_hand
+            winning_hand.append(first_card)
+            winning_hand.append(second_card)
+            if prize_cards:
+                winning_hand.extend(prize_cards)
+            return players_hands
+
+        ## -- !! war !!
+        prize_cards.append(first_card)
+        prize_cards.append(second_card)
+
+        ## -- if players do not have enough cards for war, they forfeit remaining cards
+        first_forfeits = len(first_hand) <= battle_prize_card_reward
+        second_forfeits = len(second_hand) <= battle_prize_card_reward
+        if first_forfeits:
+            prize_cards.extend(first_hand)
+            first_hand.clear()
+        if second_forfeits:
+            prize_cards.extend(second_hand)
+            second_hand.clear()
+
+        if first_forfeits and second_forfeits:
+            raise ValueError("No players remaining battle. Game ends in tie.")
+        elif first_forfeits:
+            second_hand.extend(prize_cards)
+            return players_hands
+        elif second_forfeits:
+            first_hand.extend(prize_cards)
+            return players_hands
+
+        for _ in range(battle_prize_card_reward):
+            prize_cards.append(first_hand.popleft())
+        for _ in range(battle_prize_card_reward):
+            prize_cards.append(second_hand.popleft())
+
+
 def play_turn(
     players_hands: PlayersHandDeques, battle_prize_card_reward: int = 3
+) -> PlayersHandDeques:
+    ## -- two-player turns take a dedicated path with identical results
+    if len(players_hands) == 2 and players_hands[0] and players_hands[1]:
+        return _play_turn_two_players(players_hands, battle_prize_card_reward)
+    return play_turn_general(players_hands, battle_prize_card_reward)
+
+
+def play_turn_general(
+    players_hands: PlayersHandDeques, battle_prize_card_reward: int = 3
 ) -> PlayersHandDeques:
     players_in_battle = [
         player_num
@@ -132,7 +207,8 @@ def play_turn(
         # if len(ranked_results[0][1]) == 1:
         if result["winning_player"] is not None:
             ## -- easy case, we have a single winner
-            winning_player_num = result["winning_player"]
+            ## -- scoring numbers players by position in battle, so map back to player numbers
+            winning_player_num = players_in_battle[result["winning_player"]]
             players_hands[winning_player_num].extend(played_cards)
 
             if len(prize_cards) > 0:
@@ -143,7 +219,9 @@ def play_turn(
             ## -- !! war !!
             prize_cards.extend(played_cards)
 
-            players_in_battle = result["ranking"][0][1]
+            players_in_battle = [
+                players_in_battle[position] for position in result["ranking"][0][1]
+            ]
 
             ## -- if players do not have enough cards for war, they forfeit remaining cards to ultimate war winner
             players_with_insufficient_cards_for_battle: list[PlayerNum] = []
@@ -189,7 +267,9 @@ class GameResult(TypedDict):
     starting_hands: list[list[Card]]
     ending_hands: list[list[Card]]
     player_scores: list[int]
-    end_status: Literal["winner", "draw"]
+    end_status: Literal["winner", "draw", "cycle"]
+    cycle_start: int | None
+    cycle_length: int | None
 
 
 class Game:
@@ -198,63 +278,253 @@ class Game:
         num_players: int = 2,
         cards: list[Card] | None = None,
         max_turns: int = 5_000,
+        detect_cycles: bool = False,
+        cache: OutcomeCache | None = None,
+        num_decks: int = 1,
+        battle_prize_card_reward: int = 3,
+        codes: list[CardCode] | None = None,
     ) -> None:
+        ## -- deals are held as card codes, e.g., rows of `war_probs.dealing.deal_decks`
+        assert cards is None or codes is None, "Provide either `cards` or `codes`, not both."
         self.num_players = num_players
-        self.cards = cards or load_cards()
+        self._cards = cards
+        if cards:
+            self.codes = encode_cards(cards)
+        elif codes is not None:
+            self.codes = list(codes)
+        else:
+            self.codes = load_codes(num_decks=num_decks)
+        assert 1 < num_players <= len(self.codes), (
+            f"Game needs between 2 and {len(self.codes)} players for {len(self.codes)}"
+            f" cards, got '{num_players}'."
+        )
         self.max_turns = max_turns
+        self.detect_cycles = detect_cycles
+        self.cache = cache
+        self.battle_prize_card_reward = battle_prize_card_reward
         self.id = str(uuid4())
 
-    def play(self) -> GameResult:
+    @property
+    def cards(self) -> list[Card]:
+        """The deal as cards, only built when asked for."""
+        if not self._cards:
+            self._cards = decode_cards(self.codes)
+        return self._cards
+
+    def _deal(self) -> RingHands:
+        return deal_encoded_hands(self.codes, self.num_players)
+
+    def initial_state(self) -> GameState:
+        """The dealt game as a `GameState`, to step through, fork and alter."""
+        return GameState(self._deal(), battle_prize_card_reward=self.battle_prize_card_reward)
+
+    def _cache_key(self) -> bytes:
+        return deal_key(
+            [CARD_VALUES[code] for code in self.codes],
+            num_players=self.num_players,
+            max_turns=self.max_turns,
+            battle_prize_card_reward=self.battle_prize_card_reward,
+            detect_cycles=self.detect_cycles,
+        )
+
+    def _cached_result(
+        self, outcome: CachedOutcome, start_time: float
+    ) -> GameResult | None:
+        """Rebuild a result from a cached outcome, if it records the ending hands."""
+        if outcome["end_status"] == "tie":
+            raise ValueError("No players remaining battle. Game ends in tie.")
+        if outcome["ending_positions"] is None:
+            return None
+
+        duration_milliseconds = (time.perf_counter() - start_time) * 1000
+        return GameResult(
+            id=self.id,
+            completed_turns=outcome["completed_turns"],
+            total_time=duration_milliseconds,
+            starting_hands=self._deal().to_cards(),
+            ending_hands=[
+                decode_cards(self.codes[position] for position in hand)
+                for hand in outcome["ending_positions"]
+            ],
+            player_scores=outcome["player_scores"],
+            end_status=outcome["end_status"],  # type: ignore
+            cycle_start=outcome["cycle_start"],
+            cycle_length=outcome["cycle_length"],
+        )
+
+    def _cache_result(self, cache_key: bytes, result: GameResult) -> None:
+        ## -- ending hands are stored as deal positions, which requires distinct cards
+        deal_positions = {code: position for position, code in enumerate(self.codes)}
+        ending_positions = None
+        if len(deal_positions) == len(self.codes):
+            ending_positions = [
+                [deal_positions[code] for code in encode_cards(hand)]
+                for hand in result["ending_hands"]
+            ]
+
+        self.cache.put(  # type: ignore
+            cache_key,
+            CachedOutcome(
+                completed_turns=result["completed_turns"],
+                end_status=result["end_status"],
+                player_scores=result["player_scores"],
+                cycle_start=result["cycle_start"],
+                cycle_length=result["cycle_length"],
+                ending_positions=ending_positions,
+            ),
+        )
+
+    def _find_cycle_start(self, cycle_length: int) -> tuple[int, RingHands]:
+        """Replay from the deal to find the first turn of a cycle of known length."""
+        tortoise = self._deal()
+        hare = self._deal()
+        for _ in range(cycle_length):
+            play_turn_encoded(hare, self.battle_prize_card_reward)
+
+        cycle_start: int = 0
+        while tortoise != hare:
+            play_turn_encoded(tortoise, self.battle_prize_card_reward)
+            play_turn_encoded(hare, self.battle_prize_card_reward)
+            cycle_start += 1
+
+        return cycle_start, hare
+
+    def play(
+        self,
+        trace: "TurnTrace | None" = None,
+        instrumentation: "GameInstrumentation | None" = None,
+    ) -> GameResult:
+        ## -- traces and instrumentation need every turn, so observed games are always played out
+        observed = trace is not None or instrumentation is not None
+
+        ## -- brent's algorithm notices a cycle some turns after it first completes, and
+        ## -- observers must not see those turns, so observed games find the cycle unobserved
+        cycle_start: int | None = None
+        cycle_length: int | None = None
+        detect_cycles = self.detect_cycles and not observed
+        turn_limit = self.max_turns + 1
+        if self.detect_cycles and observed:
+            unobserved = self.play()
+            if unobserved["end_status"] == "cycle":
+                cycle_start = unobserved["cycle_start"]
+                cycle_length = unobserved["cycle_length"]
+                turn_limit = unobserved["completed_turns"]
+
         ## -- start timer
         start_time = time.perf_counter()
 
-        ## -- distribute cards to players
-        players_hands = distribute_cards_to_players(self.cards)
+        ## -- outcome depends only on card values, so equivalent deals share a cached result
+        cache_key: bytes | None = None
+        if self.cache is not None and not observed:
+            cache_key = self._cache_key()
+            outcome = self.cache.get(cache_key)
+            if outcome is not None:
+                cached_result = self._cached_result(outcome, start_time)
+                if cached_result is not None:
+                    return cached_result
+
+        ## -- distribute encoded cards to players
+        players_hands = self._deal()
 
         ## -- keep record of starting game state
-        _starting_players_hands = players_hands
+        _starting_players_hands = players_hands.copy()
+
+        ## -- initiate game, tracking players still in the game instead of rescanning hands
+        num_cards = len(self.codes)
 
-        ## -- initiate game
-        game_state = get_game_state(players_hands)
+        ## -- play is deterministic, so a repeated state means the game never ends
+        ## -- brent's algorithm compares against a snapshot taken at powers of two turns
+        if detect_cycles:
+            cycle_snapshot = players_hands.copy()
+            snapshot_power: int = 1
+            turns_since_snapshot: int = 1
+
+        ## -- optional per-turn trace, sized for the longest possible game
+        if trace is not None:
+            trace.start(players_hands.num_players, capacity=self.max_turns + 1)
+
+        if instrumentation is not None:
+            deal_end_time = time.perf_counter()
+            instrumentation.deal_seconds += deal_end_time - start_time
 
         ## -- simulate war game
         _num_turns: int = 0
+        battle_prize_card_reward = self.battle_prize_card_reward
 
-        while game_is_active(game_state):
+        while len(players_hands.active) > 1:
             ## -- increment stats
             _num_turns += 1
 
             ## -- battle
-            players_hands = play_turn(players_hands)
-            assert (
-                sum([len(hand) for hand in players_hands]) == DECK_LENGTH
-            ), f"Game entered invalid state at turn {_num_turns}. Current state: {players_hands}"
-
-            ## -- update game state
-            game_state = get_game_state(players_hands)
-
-            if _num_turns > self.max_turns:
+            if not observed:
+                play_turn_encoded(players_hands, battle_prize_card_reward)
+            else:
+                if trace is not None:
+                    played_cards = players_hands.front_cards()
+                turn_summary = play_turn_encoded(players_hands, battle_prize_card_reward)
+                if trace is not None:
+                    trace.record(played_cards, turn_summary, players_hands.sizes)
+                if instrumentation is not None:
+                    instrumentation.record_turn(_num_turns, turn_summary)
+
+            if detect_cycles:
+                if players_hands == cycle_snapshot:
+                    cycle_start, players_hands = self._find_cycle_start(
+                        turns_since_snapshot
+                    )
+                    cycle_length = turns_since_snapshot
+                    _num_turns = cycle_start + cycle_length
+                    break
+
+                if turns_since_snapshot == snapshot_power:
+                    cycle_snapshot = players_hands.copy()
+                    snapshot_power *= 2
+                    turns_since_snapshot = 0
+                turns_since_snapshot += 1
+
+            if _num_turns >= turn_limit:
                 break
 
+        ## -- turns only move cards between hands, so the total is checked once, not every turn
+        assert (
+            sum(players_hands.sizes) == num_cards
+        ), f"Game ended in invalid state after turn {_num_turns}. Final state: {players_hands}"
+
         ## -- return game results
         end_time = time.perf_counter()
         duration_seconds = end_time - start_time
         duration_milliseconds = duration_seconds * 1000
 
-        player_scores = [len(hand) for hand in players_hands]
+        if instrumentation is not None:
+            instrumentation.turn_loop_seconds += end_time - deal_end_time
+
+        player_scores = list(players_hands.sizes)
 
         ## -- temporary way to get winner or draw status
-        if math.prod(player_scores) != 0:
+        if cycle_length is not None:
+            end_status = "cycle"
+        elif len(players_hands.active) > 1:
             end_status = "draw"
         else:
             end_status = "winner"
 
-        return GameResult(
+        result = GameResult(
             id=self.id,
             completed_turns=_num_turns,
             total_time=duration_milliseconds,
-            starting_hands=[list(hand) for hand in _starting_players_hands],
-            ending_hands=[list(hand) for hand in players_hands],
+            starting_hands=_starting_players_hands.to_cards(),
+            ending_hands=players_hands.to_cards(),
             player_scores=player_scores,
             end_status=end_status,
+            cycle_start=cycle_start,
+            cycle_length=cycle_length,
         )
+
+        if cache_key is not None:
+            self._cache_result(cache_key, result)
+
+        if instrumentation is not None:
+            instrumentation.result_seconds += time.perf_counter() - end_time
+            instrumentation.games += 1
+
+        return result
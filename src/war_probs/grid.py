@@ -0,0 +1,269 @@
+"""
+Grid sweeps over game settings with common random numbers.
+
+Every configuration of a grid plays the same seeded deals, so a comparison between two
+configurations is a paired comparison of the same games, and most of the deal-to-deal
+variance cancels out of their difference. Deals are generated once per shard, exactly
+as `war_probs.runner.run_simulations` deals them, and shared by every configuration.
+
+Two-player configurations run on the lockstep batch engine. Configurations with more
+players, or sweeps over the turn value exponent `k`, are played with `Game`, where
+every `k` is scored from a single traced game.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+from typing import NamedTuple, TypedDict
+
+import numpy as np
+import polars as pl
+
+from war_probs.batch import END_STATUS_LABELS, STATUS_TIE, STATUS_WINNER, simulate_batch
+from war_probs.dealing import deal_decks
+from war_probs.game import Game
+from war_probs.runner import DEFAULT_SHARD_SIZE, ShardSpec, plan_shards, resolve_seed, shard_rng
+from war_probs.sink import END_STATUS_DTYPE
+from war_probs.trace import SwingStats, TurnTrace, swing_stats_from_turn_values
+
+## -- grid axes and their defaults, in the order configurations are enumerated
+GRID_AXES: dict[str, int | float] = {
+    "battle_prize_card_reward": 3,
+    "max_turns": 5_000,
+    "num_players": 2,
+    "k": 2,
+}
+
+Grid = dict[str, list]
+
+SWING_METRICS: tuple[str, ...] = tuple(
+    name for name in SwingStats.__annotations__ if name != "turns"
+)
+
+
+class PlaySettings(NamedTuple):
+    """Settings that change how a game plays out, as opposed to how it is scored."""
+
+    battle_prize_card_reward: int
+    max_turns: int
+    num_players: int
+
+
+class GridResult(TypedDict):
+    configurations: pl.DataFrame
+    games: pl.DataFrame
+    comparisons: pl.DataFrame
+
+
+def grid_configurations(grid: Grid) -> list[dict[str, int | float]]:
+    """Every combination of the grid's values, with defaults for axes not swept."""
+    unknown = set(grid) - set(GRID_AXES)
+    assert not unknown, f"Unknown grid axes: {sorted(unknown)}."
+    axes = {name: list(grid.get(name, [default])) for name, default in GRID_AXES.items()}
+    assert all(axes.values()), "Every grid axis needs at least one value."
+    return [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+
+
+def _play_settings(configuration: dict[str, int | float]) -> PlaySettings:
+    return PlaySettings(
+        battle_prize_card_reward=int(configuration["battle_prize_card_reward"]),
+        max_turns=int(configuration["max_turns"]),
+        num_players=int(configuration["num_players"]),
+    )
+
+
+def _batch_columns(decks: np.ndarray, settings: PlaySettings) -> dict[str, np.ndarray]:
+    result = simulate_batch(
+        decks=decks,
+        max_turns=settings.max_turns,
+        battle_prize_card_reward=settings.battle_prize_card_reward,
+    )
+    winner = np.where(
+        result["end_status"] == STATUS_WINNER, np.argmax(result["player_scores"], axis=1), -1
+    )
+    ## -- ties have no turn count, as when `Game` raises on them
+    turns = np.where(
+        result["end_status"] == STATUS_TIE, np.nan, result["completed_turns"]
+    ).astype(np.float64)
+    return {
+        "turns": turns,
+        "end_status": result["end_status"],
+        "winner": winner.astype(np.int8),
+    }
+
+
+def _game_columns(
+    deals: list[list[int]], settings: PlaySettings, ks: list[float]
+) -> tuple[dict[str, np.ndarray], dict[float, dict[str, np.ndarray]]]:
+    """Play every deal with `Game`, scoring swing statistics for each `k` from one trace."""
+    n_games = len(deals)
+    columns = {
+        "turns": np.full(n_games, np.nan),
+        "end_status": np.full(n_games, END_STATUS_LABELS.index("tie"), dtype=np.int8),
+        "winner": np.full(n_games, -1, dtype=np.int8),
+    }
+    swings = {k: {name: np.full(n_games, np.nan) for name in SWING_METRICS} for k in ks}
+    trace = TurnTrace() if ks else None
+
+    for game_num, codes in enumerate(deals):
+        game = Game(
+            num_players=settings.num_players,
+            codes=codes,
+            max_turns=settings.max_turns,
+            battle_prize_card_reward=settings.battle_prize_card_reward,
+        )
+        try:
+            result = game.play(trace=trace)
+        except ValueError:
+            ## -- tied wars that no player can continue end the game without a result
+            continue
+
+        columns["turns"][game_num] = result["completed_turns"]
+        columns["end_status"][game_num] = END_STATUS_LABELS.index(result["end_status"])
+        if result["end_status"] == "winner":
+            columns["winner"][game_num] = np.argmax(result["player_scores"])
+        for k in ks:
+            stats = swing_stats_from_turn_values(trace.turn_values_for(k))  # type: ignore
+            for name in SWING_METRICS:
+                swings[k][name][game_num] = stats[name]  # type: ignore
+
+    return columns, swings
+
+
+def _simulate_grid_shard(spec: ShardSpec, configurations: list[dict]) -> pl.DataFrame:
+    ## -- one set of deals per shard, shared by every configuration
+    decks = deal_decks(spec.n_games, shard_rng(spec.seed, spec.shard_index))
+    game_index = np.arange(spec.first_game, spec.first_game + spec.n_games, dtype=np.int64)
+    sweeps_k = len({configuration["k"] for configuration in configurations}) > 1
+
+    ## -- configurations differing only in `k` play out identically, so play each once
+    play_groups: dict[PlaySettings, dict[float, int]] = {}
+    for configuration_num, configuration in enumerate(configurations):
+        play_groups.setdefault(_play_settings(configuration), {})[
+            configuration["k"]
+        ] = configuration_num
+
+    deals: list[list[int]] | None = None
+    frames: list[pl.DataFrame] = []
+    for settings, ks in play_groups.items():
+        if settings.num_players == 2 and not sweeps_k:
+            columns = _batch_columns(decks, settings)
+            swings: dict[float, dict[str, np.ndarray]] = {k: {} for k in ks}
+        else:
+            ## -- deals are converted once per shard, for every configuration played with `Game`
+            deals = deals or decks.tolist()
+            columns, swings = _game_columns(deals, settings, list(ks) if sweeps_k else [])
+            if not sweeps_k:
+                swings = {k: {} for k in ks}
+
+        for k, configuration_num in ks.items():
+            frame = {
+                "configuration": configuration_num,
+                "battle_prize_card_reward": settings.battle_prize_card_reward,
+                "max_turns": settings.max_turns,
+                "num_players": settings.num_players,
+                "k": k,
+                "id": game_index,
+                "turns": columns["turns"],
+                "end_status": np.asarray(END_STATUS_LABELS)[columns["end_status"]],
+                "winner": columns["winner"],
+                "player_0_wins": (columns["winner"] == 0).astype(np.float64),
+                "draw": (columns["end_status"] == END_STATUS_LABELS.index("draw")).astype(
+                    np.float64
+                ),
+                **swings[k],
+            }
+            frames.append(
+                pl.DataFrame(frame).with_columns(
+                    pl.col("end_status").cast(END_STATUS_DTYPE),
+                    pl.col("winner").replace(-1, None),
+                )
+            )
+
+    return pl.concat(frames, how="diagonal")
+
+
+def paired_differences(
+    games: pl.DataFrame, metrics: list[str], confidence: float = 0.95
+) -> pl.DataFrame:
+    """
+    Compare every configuration with configuration 0, game by game. Games missing a
+    metric in either configuration, e.g., ties, are left out of that metric's comparison.
+    `variance_reduction` is how much smaller the variance of the paired difference is
+    than it would be with independent deals for each configuration.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    configuration_columns = ["configuration", *GRID_AXES]
+    baseline = games.filter(pl.col("configuration") == 0)
+
+    long = games.unpivot(
+        index=[*configuration_columns, "id"], on=metrics, variable_name="metric"
+    )
+    baseline_long = baseline.unpivot(
+        index=["id"], on=metrics, variable_name="metric", value_name="baseline_value"
+    )
+    paired = long.join(baseline_long, on=["id", "metric"]).drop_nulls(
+        ["value", "baseline_value"]
+    ).filter(pl.col("value").is_not_nan() & pl.col("baseline_value").is_not_nan())
+
+    difference = pl.col("value") - pl.col("baseline_value")
+    return (
+        paired.group_by([*configuration_columns, "metric"], maintain_order=True)
+        .agg(
+            pl.len().alias("num_pairs"),
+            pl.col("baseline_value").mean().alias("baseline_mean"),
+            pl.col("value").mean().alias("mean"),
+            difference.mean().alias("mean_difference"),
+            (difference.std() / pl.len().sqrt()).alias("std_error"),
+            pl.corr("value", "baseline_value").alias("correlation"),
+            (
+                1
+                - difference.var()
+                / (pl.col("value").var() + pl.col("baseline_value").var())
+            ).alias("variance_reduction"),
+        )
+        .with_columns(
+            (pl.col("mean_difference") - z * pl.col("std_error")).alias("ci_lower"),
+            (pl.col("mean_difference") + z * pl.col("std_error")).alias("ci_upper"),
+        )
+    )
+
+
+def run_grid(
+    grid: Grid,
+    n: int,
+    workers: int | None = None,
+    seed: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    confidence: float = 0.95,
+) -> GridResult:
+    """
+    Play `n` seeded deals under every configuration of `grid`, e.g.,
+    `{"battle_prize_card_reward": [1, 3, 5], "num_players": [2, 3]}`.
+
+    Returns the configurations, a tidy frame with one row per configuration and game,
+    and paired differences of every metric against the first configuration. Games are
+    dealt exactly as `run_simulations` deals them for the same `seed` and `shard_size`.
+    """
+    configurations = grid_configurations(grid)
+    shards = plan_shards(n, seed=resolve_seed(seed), shard_size=shard_size)
+    simulate = partial(_simulate_grid_shard, configurations=configurations)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(shards) == 1:
+        frames = [simulate(spec) for spec in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(simulate, shards))
+
+    games = pl.concat(frames, how="diagonal").sort(["configuration", "id"])
+
+    metrics = ["turns", "player_0_wins", "draw"]
+    metrics += [name for name in SWING_METRICS if name in games.columns]
+    return GridResult(
+        configurations=pl.DataFrame(configurations).with_row_index("configuration"),
+        games=games,
+        comparisons=paired_differences(games, metrics, confidence=confidence),
+    )
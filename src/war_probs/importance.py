@@ -0,0 +1,252 @@
+"""
+Importance sampling of deals for the long-game tail of the turn count distribution.
+
+Play is deterministic once the cards are dealt, so the deal is the only place to bias a
+simulation. Deals are drawn by first drawing the number of high cards dealt to player 0
+from a proposal distribution, then dealing uniformly among deals with that split. The
+likelihood ratio of a deal is then the ratio of the true (hypergeometric) probability of
+its split to the proposal's, and weighting every game by it keeps estimates unbiased.
+
+The proposal is tuned on a plain pilot run: splits are drawn in proportion to their true
+probability times the square root of their observed tail rate, the variance-minimizing
+choice for a tail probability, mixed with the true split distribution so no split is
+starved. As in `turn_count_distribution_histogram`, the tail is over games ending with
+a winner. The diagnostics report how much the proposal actually gained over plain
+sampling, which is only as large as the split's influence on game length.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.batch import STATUS_WINNER, simulate_batch
+from war_probs.cards import CARD_VALUES, Value
+from war_probs.dealing import deal_with_split, split_probability
+from war_probs.runner import DEFAULT_SHARD_SIZE, ShardSpec, plan_shards, resolve_seed, shard_rng
+
+DEFAULT_PILOT_GAMES: int = 20_000
+DEFAULT_DEFENSIVE_MIX: float = 0.2
+
+
+class TailEstimate(TypedDict):
+    turns: int
+    probability: float
+    std_error: float
+    ci_lower: float
+    ci_upper: float
+    ## -- plain sampling variance over importance sampling variance, for the same games
+    relative_efficiency: float
+
+
+class WeightDiagnostics(TypedDict):
+    effective_sample_size: float
+    max_weight: float
+    weight_cv: float
+    mean_weight: float
+
+
+class ImportanceSamplingResult(TypedDict):
+    seed: int
+    num_games: int
+    pilot_games: int
+    high_value: int
+    split_probabilities: list[float]
+    proposal: list[float]
+    tail: list[TailEstimate]
+    quantiles: dict[float, float]
+    diagnostics: WeightDiagnostics
+    high_cards: np.ndarray
+    completed_turns: np.ndarray
+    end_status: np.ndarray
+    weights: np.ndarray
+
+
+def high_card_split_probabilities(high_value: int = Value.KING.value) -> np.ndarray:
+    """Probability that player 0 is dealt each number of cards valued `high_value` or more."""
+    num_high = sum(value >= high_value for value in CARD_VALUES)
+    return split_probability(np.arange(num_high + 1)[:, None], [num_high])
+
+
+def deal_with_high_cards(
+    high_cards: np.ndarray, rng: np.random.Generator, high_value: int = Value.KING.value
+) -> np.ndarray:
+    """
+    Decks of card codes, uniformly shuffled among deals giving player 0 exactly
+    `high_cards[game]` cards valued `high_value` or more.
+    """
+    high_codes = np.flatnonzero(np.asarray(CARD_VALUES) >= high_value)
+    return deal_with_split(high_cards[:, None], [high_codes], rng)
+
+
+def _simulate_importance_shard(
+    spec: ShardSpec, proposal: np.ndarray, high_value: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = shard_rng(spec.seed, spec.shard_index)
+    high_cards = rng.choice(proposal.size, size=spec.n_games, p=proposal)
+    result = simulate_batch(
+        decks=deal_with_high_cards(high_cards, rng, high_value),
+        max_turns=spec.max_turns,
+        battle_prize_card_reward=spec.battle_prize_card_reward,
+    )
+    return high_cards, result["completed_turns"], result["end_status"]
+
+
+def _simulate(
+    shards: list[ShardSpec], proposal: np.ndarray, high_value: int, workers: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    simulate = partial(_simulate_importance_shard, proposal=proposal, high_value=high_value)
+    if workers == 1 or len(shards) <= 1:
+        results = [simulate(spec) for spec in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate, shards))
+    high_cards, completed_turns, end_status = zip(*results)
+    return (
+        np.concatenate(high_cards),
+        np.concatenate(completed_turns),
+        np.concatenate(end_status),
+    )
+
+
+def tuned_proposal(
+    split_probabilities: np.ndarray,
+    high_cards: np.ndarray,
+    in_tail: np.ndarray,
+    defensive_mix: float = DEFAULT_DEFENSIVE_MIX,
+) -> np.ndarray:
+    """
+    Proposal over splits proportional to `p(split) * sqrt(tail rate given split)`, from
+    pilot games, mixed with the true split distribution in proportion `defensive_mix`.
+    """
+    num_splits = split_probabilities.size
+    games = np.bincount(high_cards, minlength=num_splits)
+    tail_games = np.bincount(high_cards, weights=in_tail, minlength=num_splits)
+    ## -- shrink rates towards the overall rate, so splits unseen in the pilot keep some mass
+    overall_rate = (in_tail.sum() + 0.5) / (in_tail.size + 1)
+    tail_rates = (tail_games + overall_rate) / (games + 1)
+
+    optimal = split_probabilities * np.sqrt(tail_rates)
+    optimal /= optimal.sum()
+    return (1 - defensive_mix) * optimal + defensive_mix * split_probabilities
+
+
+def weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    position = np.searchsorted(cumulative, q * cumulative[-1])
+    return float(values[order][min(position, values.size - 1)])
+
+
+def weight_diagnostics(weights: np.ndarray) -> WeightDiagnostics:
+    return WeightDiagnostics(
+        effective_sample_size=float(weights.sum() ** 2 / (weights**2).sum()),
+        max_weight=float(weights.max()),
+        weight_cv=float(weights.std() / weights.mean()),
+        mean_weight=float(weights.mean()),
+    )
+
+
+def run_tail_importance_sampling(
+    n: int,
+    tail_turns: tuple[int, ...] = (1_000, 2_000, 3_000),
+    quantiles: tuple[float, ...] = (0.99, 0.999),
+    high_value: int = Value.KING.value,
+    pilot_games: int = DEFAULT_PILOT_GAMES,
+    defensive_mix: float = DEFAULT_DEFENSIVE_MIX,
+    confidence: float = 0.95,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> ImportanceSamplingResult:
+    """
+    Estimate the probability that a two-player game ends with a winner after more than
+    each of `tail_turns` turns, and upper `quantiles` of winning turn counts, from `n`
+    importance sampled games after a pilot run of `pilot_games` plain ones.
+
+    The proposal is tuned for the smallest of `tail_turns`. Every game's likelihood ratio
+    weight is returned with it, so other weighted estimates can be made from the games.
+    """
+    assert 0 < defensive_mix <= 1, f"Defensive mix must be in (0, 1], got '{defensive_mix}'."
+    assert len(tail_turns) > 0, "At least one tail threshold is required."
+
+    seed = resolve_seed(seed)
+    workers = workers or os.cpu_count() or 1
+    split_probabilities = high_card_split_probabilities(high_value)
+
+    ## -- pilot and main games draw from separate shard streams of the same seed
+    plan = partial(
+        plan_shards,
+        seed=seed,
+        max_turns=max_turns,
+        battle_prize_card_reward=battle_prize_card_reward,
+        shard_size=shard_size,
+    )
+    pilot_shards = plan(pilot_games)
+    main_shards = [
+        spec._replace(shard_index=spec.shard_index + len(pilot_shards)) for spec in plan(n)
+    ]
+
+    proposal = split_probabilities
+    if pilot_shards:
+        pilot_high_cards, pilot_turns, pilot_status = _simulate(
+            pilot_shards, split_probabilities, high_value, workers
+        )
+        pilot_tail = (pilot_status == STATUS_WINNER) & (pilot_turns > min(tail_turns))
+        proposal = tuned_proposal(
+            split_probabilities, pilot_high_cards, pilot_tail, defensive_mix
+        )
+
+    high_cards, completed_turns, end_status = _simulate(
+        main_shards, proposal, high_value, workers
+    )
+    weights = split_probabilities[high_cards] / proposal[high_cards]
+    winners = end_status == STATUS_WINNER
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    tail: list[TailEstimate] = []
+    for turns in tail_turns:
+        in_tail = winners & (completed_turns > turns)
+        weighted = weights * in_tail
+        probability = float(weighted.mean())
+        std_error = float(weighted.std(ddof=1) / math.sqrt(n))
+        plain_variance = probability * (1 - probability)
+        tail.append(
+            TailEstimate(
+                turns=turns,
+                probability=probability,
+                std_error=std_error,
+                ci_lower=probability - z * std_error,
+                ci_upper=probability + z * std_error,
+                relative_efficiency=(
+                    float(plain_variance / weighted.var(ddof=1))
+                    if weighted.var() > 0
+                    else math.nan
+                ),
+            )
+        )
+
+    return ImportanceSamplingResult(
+        seed=seed,
+        num_games=n,
+        pilot_games=pilot_games,
+        high_value=high_value,
+        split_probabilities=split_probabilities.tolist(),
+        proposal=proposal.tolist(),
+        tail=tail,
+        quantiles={
+            q: weighted_quantile(completed_turns[winners], weights[winners], q)
+            for q in quantiles
+        },
+        diagnostics=weight_diagnostics(weights),
+        high_cards=high_cards,
+        completed_turns=completed_turns,
+        end_status=end_status,
+        weights=weights,
+    )
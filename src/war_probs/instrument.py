@@ -0,0 +1,105 @@
+"""
+Optional instrumentation for `Game.play`: per-phase timers, turn and war counters, and
+event hooks. Pass the same `GameInstrumentation` to many games to aggregate across
+them, and `merge` instances collected in different processes.
+"""
+
+from collections.abc import Callable
+from typing import TypedDict
+
+from war_probs.encoded import TurnSummary
+
+## -- on_turn(turn_number, turn_summary), on_war(turn_number, war_depth, winning_player)
+TurnHook = Callable[[int, TurnSummary], None]
+WarHook = Callable[[int, int, int], None]
+
+
+class InstrumentationSummary(TypedDict):
+    games: int
+    turns: int
+    deal_seconds: float
+    turn_loop_seconds: float
+    result_seconds: float
+    wars: int
+    war_turns: int
+    max_war_depth: int
+    forfeits: int
+    cards_transferred: int
+    hand_operations: int
+
+
+class GameInstrumentation:
+    def __init__(
+        self, on_turn: TurnHook | None = None, on_war: WarHook | None = None
+    ) -> None:
+        self.on_turn = on_turn
+        self.on_war = on_war
+
+        ## -- phase timers
+        self.games: int = 0
+        self.deal_seconds: float = 0.0
+        self.turn_loop_seconds: float = 0.0
+        self.result_seconds: float = 0.0
+
+        ## -- counters
+        self.turns: int = 0
+        self.wars: int = 0
+        self.war_turns: int = 0
+        self.max_war_depth: int = 0
+        self.forfeits: int = 0
+        self.cards_transferred: int = 0
+        self.hand_operations: int = 0
+
+    def record_turn(self, turn_number: int, summary: TurnSummary) -> None:
+        winning_player, wars, cards_awarded, forfeits = summary
+        self.turns += 1
+        self.forfeits += forfeits
+
+        ## -- every card awarded was taken from the front of a hand and added to the back of one
+        self.cards_transferred += cards_awarded
+        self.hand_operations += 2 * cards_awarded
+
+        if wars > 0:
+            self.wars += wars
+            self.war_turns += 1
+            if wars > self.max_war_depth:
+                self.max_war_depth = wars
+            if self.on_war is not None:
+                self.on_war(turn_number, wars, winning_player)
+
+        if self.on_turn is not None:
+            self.on_turn(turn_number, summary)
+
+    def merge(self, other: "GameInstrumentation") -> "GameInstrumentation":
+        """Add another instance's timers and counters into this one, in place."""
+        self.games += other.games
+        self.deal_seconds += other.deal_seconds
+        self.turn_loop_seconds += other.turn_loop_seconds
+        self.result_seconds += other.result_seconds
+        self.turns += other.turns
+        self.wars += other.wars
+        self.war_turns += other.war_turns
+        self.max_war_depth = max(self.max_war_depth, other.max_war_depth)
+        self.forfeits += other.forfeits
+        self.cards_transferred += other.cards_transferred
+        self.hand_operations += other.hand_operations
+        return self
+
+    def summary(self) -> InstrumentationSummary:
+        return InstrumentationSummary(
+            games=self.games,
+            turns=self.turns,
+            deal_seconds=self.deal_seconds,
+            turn_loop_seconds=self.turn_loop_seconds,
+            result_seconds=self.result_seconds,
+            wars=self.wars,
+            war_turns=self.war_turns,
+            max_war_depth=self.max_war_depth,
+            forfeits=self.forfeits,
+            cards_transferred=self.cards_transferred,
+            hand_operations=self.hand_operations,
+        )
+
+    def __getstate__(self) -> dict:
+        ## -- hooks are often closures, which cannot be sent between processes
+        return {**self.__dict__, "on_turn": None, "on_war": None}
@@ -1,8 +1,17 @@
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 import numpy as np
-import seaborn as sns
 
-from war_probs.cards import Card, get_suit
+from war_probs.cards import Card, Value, get_suit
+
+## -- plotting libraries are imported when a plot is drawn, so simulation workers
+## -- importing the metrics never pay for them
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+## -- lookup tables cover card values 0 through 14, so a value of 0 can pad missing cards
+_NUM_TABLE_VALUES: int = Value.ACE.value + 1
 
 
 def calc_war_value(played_value: int, won_value: int, k: int = 2) -> float:
@@ -42,28 +51,80 @@ def turn_value(your_card: Card, opp_card: Card, k: int = 2) -> float:
     return _calculate_turn_value(your_card.value, opp_card.value, k)
 
 
-def turn_values_matrix() -> np.ndarray:
-    ## -- get list of cards with all distinct ranks
-    cards = get_suit(suit="clubs")
+## ------------------------------------------------- ##
+## ---- VECTORIZED METRICS OVER ARRAYS OF VALUES ---- ##
+## ------------------------------------------------- ##
+
+
+@lru_cache
+def war_value_table(k: float = 2) -> np.ndarray:
+    """`calc_war_value` for every pair of card values, indexed by `[played, won]`."""
+    played = np.arange(_NUM_TABLE_VALUES)[:, None]
+    won = np.arange(_NUM_TABLE_VALUES)[None, :]
+    table = won * (1 - np.abs(won - played) / 13) ** k
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache
+def turn_value_table(k: float = 2) -> np.ndarray:
+    """`turn_value` for every pair of card values, indexed by `[your_value, opp_value]`."""
+    your = np.arange(_NUM_TABLE_VALUES)[:, None]
+    opp = np.arange(_NUM_TABLE_VALUES)[None, :]
+    margin = np.abs(your - opp)
+    table = np.where(
+        your > opp,
+        opp * (1 - margin / 13) ** k,
+        -(your * (1 - margin / 13) ** k),
+    )
+    table[your == opp] = 0
+    table.flags.writeable = False
+    return table
+
+
+def calc_war_values(played_values, won_values, k: float = 2) -> np.ndarray:
+    """Array version of `calc_war_value`."""
+    return war_value_table(k)[played_values, won_values]
+
+
+def war_scores(played_values, won_values) -> np.ndarray:
+    """Array version of `war_score`, taking card values rather than cards."""
+    return war_value_table(2)[played_values, won_values]
 
-    # Create the confusion matrix
-    num_ranks = len(cards)
-    score_matrix = np.zeros((num_ranks, num_ranks))
 
-    for i, your_card in enumerate(cards):
-        for j, opp_card in enumerate(cards):
-            score_matrix[i, j] = turn_value(your_card, opp_card)
+def turn_values(your_values, opp_values, k: float = 2) -> np.ndarray:
+    """Array version of `turn_value`, taking card values rather than cards."""
+    return turn_value_table(k)[your_values, opp_values]
 
-    return score_matrix
+
+def war_scenario_values(winning_values, won_values, k: float = 2) -> np.ndarray:
+    """
+    Value of winning a war, where the loser transfers several cards at once.
+    Each card won is scored against the winning card with `calc_war_value`, and the
+    scores are summed per war. `won_values` has one row per war, padded with 0 for
+    wars that transfer fewer cards.
+    """
+    winning_values = np.asarray(winning_values)
+    return war_value_table(k)[winning_values[:, None], won_values].sum(axis=1)
+
+
+def turn_values_matrix(k: float = 2) -> np.ndarray:
+    ## -- rows and columns run over distinct ranks, two through ace
+    card_values = [card.value for card in get_suit(suit="clubs")]
+    return turn_value_table(k)[np.ix_(card_values, card_values)]
 
 
 def turn_values_matrix_plot(
     score_matrix: np.ndarray | None = None,
     figsize: tuple[int, int] = (12, 10),
     _war_annotation: str = "*WAR",
-) -> plt.Figure:  # type: ignore
+) -> "plt.Figure":  # type: ignore
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     ## -- generate score matrix if not provided
-    score_matrix = score_matrix or turn_values_matrix()
+    if score_matrix is None:
+        score_matrix = turn_values_matrix()
 
     ## -- get name of card ranks
     single_suit_cards = get_suit(suit="clubs")
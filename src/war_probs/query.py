@@ -0,0 +1,64 @@
+"""
+Conditional outcome queries over stored results with deal features.
+
+Datasets written with `write_simulations(..., include_features=True)` hold one row per
+game with its outcome and deal features (see `war_probs.features`). Queries are polars
+lazy frames over the part files: filters are pushed down into the Parquet scan, where
+row group statistics skip data that cannot match, and only the columns a query uses are
+read. E.g., P(player 0 wins | aces held) or mean turns by value sum difference:
+
+    games = scan_games("results/run-42")
+    outcomes_by(games, "ace_count_0")
+    outcomes_by(games, pl.col("value_sum_difference") // 10 * 10, pl.col("ace_count_0") == 2)
+"""
+
+from pathlib import Path
+
+import polars as pl
+
+from war_probs.sink import scan_results
+
+_WINNER = pl.col("end_status") == "winner"
+
+OUTCOME_COLUMNS: tuple[str, ...] = (
+    "num_games",
+    "player_0_win_rate",
+    "player_1_win_rate",
+    "draw_rate",
+    "mean_turns",
+    "mean_winner_turns",
+)
+
+
+def scan_games(directory: str | Path) -> pl.LazyFrame:
+    games = scan_results(directory)
+    assert (
+        "value_sum_difference" in games.collect_schema().names()
+    ), f"'{directory}' was written without deal features, see `include_features`."
+    return games
+
+
+def outcomes_by(
+    games: pl.LazyFrame,
+    by: str | pl.Expr | list[str | pl.Expr],
+    where: pl.Expr | None = None,
+) -> pl.DataFrame:
+    """
+    Game counts, win and draw rates and mean turns for every group of `by`, a feature
+    column or expression, over the games matching `where`.
+    """
+    if where is not None:
+        games = games.filter(where)
+    outcomes = (
+        games.group_by(by)
+        .agg(
+            pl.len().alias("num_games"),
+            (_WINNER & (pl.col("score_0") > 0)).mean().alias("player_0_win_rate"),
+            (_WINNER & (pl.col("score_1") > 0)).mean().alias("player_1_win_rate"),
+            (pl.col("end_status") == "draw").mean().alias("draw_rate"),
+            pl.col("turns").mean().alias("mean_turns"),
+            pl.col("turns").filter(_WINNER).mean().alias("mean_winner_turns"),
+        )
+        .collect()
+    )
+    return outcomes.sort(outcomes.columns[: -len(OUTCOME_COLUMNS)])
@@ -0,0 +1,280 @@
+"""
+Parallel simulation runner built on the lockstep batch engine.
+
+Games are split into fixed-size shards. Each shard draws its deals from its own
+NumPy random stream, spawned from the run seed and the shard index, so results
+for a given seed are identical regardless of how many worker processes run them.
+"""
+
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, TypedDict
+
+import numpy as np
+
+from war_probs.batch import END_STATUS_LABELS, simulate_batch
+from war_probs.cache import CachedOutcome, OutcomeCache, deal_keys
+from war_probs.dealing import deal_decks
+
+DEFAULT_SHARD_SIZE: int = 10_000
+
+
+class ShardSpec(NamedTuple):
+    seed: int
+    shard_index: int
+    first_game: int
+    n_games: int
+    max_turns: int
+    battle_prize_card_reward: int
+    include_deals: bool
+    cache_path: str | None = None
+
+
+class SimulationSummary(TypedDict):
+    seed: int
+    game_index: np.ndarray
+    completed_turns: np.ndarray
+    end_status: np.ndarray
+    player_scores: np.ndarray
+    deals: np.ndarray | None
+
+
+def resolve_seed(seed: int | None) -> int:
+    """Use the provided seed, or draw fresh entropy so the run can be reproduced later."""
+    if seed is None:
+        return int(np.random.SeedSequence().generate_state(1, dtype=np.uint64)[0])
+    return seed
+
+
+def shard_rng(seed: int, shard_index: int) -> np.random.Generator:
+    """Independent random stream for a single shard of a run."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard_index,)))
+
+
+def plan_shards(
+    n: int,
+    seed: int,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    include_deals: bool = False,
+    cache_path: str | None = None,
+) -> list[ShardSpec]:
+    assert shard_size > 0, f"Shard size must be positive, got '{shard_size}'."
+    return [
+        ShardSpec(
+            seed=seed,
+            shard_index=shard_index,
+            first_game=start,
+            n_games=min(shard_size, n - start),
+            max_turns=max_turns,
+            battle_prize_card_reward=battle_prize_card_reward,
+            include_deals=include_deals,
+            cache_path=cache_path,
+        )
+        for shard_index, start in enumerate(range(0, n, shard_size))
+    ]
+
+
+def _simulate_decks_with_cache(
+    decks: np.ndarray, spec: ShardSpec
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Look every deal up in the outcome cache, simulating and storing only the misses."""
+    keys = deal_keys(
+        decks,
+        max_turns=spec.max_turns,
+        battle_prize_card_reward=spec.battle_prize_card_reward,
+    )
+    completed_turns = np.zeros(spec.n_games, dtype=np.int64)
+    end_status = np.zeros(spec.n_games, dtype=np.int8)
+    player_scores = np.zeros((spec.n_games, 2), dtype=np.int64)
+
+    with OutcomeCache(spec.cache_path) as cache:  # type: ignore
+        cached = cache.get_many(keys)
+        misses = np.array(
+            [game for game, key in enumerate(keys) if key not in cached], dtype=np.int64
+        )
+        for game, key in enumerate(keys):
+            if key in cached:
+                completed_turns[game] = cached[key]["completed_turns"]
+                end_status[game] = END_STATUS_LABELS.index(cached[key]["end_status"])
+                player_scores[game] = cached[key]["player_scores"]
+
+        if misses.size > 0:
+            result = simulate_batch(
+                decks=decks[misses],
+                max_turns=spec.max_turns,
+                battle_prize_card_reward=spec.battle_prize_card_reward,
+            )
+            completed_turns[misses] = result["completed_turns"]
+            end_status[misses] = result["end_status"]
+            player_scores[misses] = result["player_scores"]
+
+            cache.put_many(
+                (
+                    keys[game],
+                    CachedOutcome(
+                        completed_turns=int(completed_turns[game]),
+                        end_status=END_STATUS_LABELS[end_status[game]],
+                        player_scores=player_scores[game].tolist(),
+                        cycle_start=None,
+                        cycle_length=None,
+                        ending_positions=None,
+                    ),
+                )
+                for game in misses
+            )
+
+    return completed_turns, end_status, player_scores
+
+
+def simulate_shard(spec: ShardSpec) -> SimulationSummary:
+    decks = deal_decks(spec.n_games, shard_rng(spec.seed, spec.shard_index))
+
+    if spec.cache_path is not None:
+        completed_turns, end_status, player_scores = _simulate_decks_with_cache(decks, spec)
+    else:
+        result = simulate_batch(
+            decks=decks,
+            max_turns=spec.max_turns,
+            battle_prize_card_reward=spec.battle_prize_card_reward,
+        )
+        completed_turns = result["completed_turns"]
+        end_status = result["end_status"]
+        player_scores = result["player_scores"]
+
+    return SimulationSummary(
+        seed=spec.seed,
+        game_index=np.arange(
+            spec.first_game, spec.first_game + spec.n_games, dtype=np.int64
+        ),
+        completed_turns=completed_turns.astype(np.int32),
+        end_status=end_status,
+        player_scores=player_scores.astype(np.uint8),
+        deals=decks if spec.include_deals else None,
+    )
+
+
+def simulate_shards(specs: list[ShardSpec]) -> list[SimulationSummary]:
+    """
+    Simulate several uncached shards with the same game settings in a single lockstep
+    batch. Each game plays out independently of the rest of its batch, so every summary
+    is identical to `simulate_shard` on its own.
+    """
+    assert len(specs) > 0, "At least one shard is required."
+    assert all(spec.cache_path is None for spec in specs), "Coalesced shards are not cached."
+    settings = {(spec.max_turns, spec.battle_prize_card_reward) for spec in specs}
+    assert len(settings) == 1, "Coalesced shards must share game settings."
+
+    decks = [deal_decks(spec.n_games, shard_rng(spec.seed, spec.shard_index)) for spec in specs]
+    result = simulate_batch(
+        decks=np.concatenate(decks),
+        max_turns=specs[0].max_turns,
+        battle_prize_card_reward=specs[0].battle_prize_card_reward,
+    )
+
+    summaries: list[SimulationSummary] = []
+    start: int = 0
+    for spec, shard_decks in zip(specs, decks):
+        stop = start + spec.n_games
+        summaries.append(
+            SimulationSummary(
+                seed=spec.seed,
+                game_index=np.arange(
+                    spec.first_game, spec.first_game + spec.n_games, dtype=np.int64
+                ),
+                completed_turns=result["completed_turns"][start:stop].astype(np.int32),
+                end_status=result["end_status"][start:stop],
+                player_scores=result["player_scores"][start:stop].astype(np.uint8),
+                deals=shard_decks if spec.include_deals else None,
+            )
+        )
+        start = stop
+    return summaries
+
+
+def iter_simulations(
+    n: int,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    include_deals: bool = False,
+    cache_path: str | None = None,
+) -> Iterator[SimulationSummary]:
+    """Yield per-shard summaries in shard order as they complete."""
+    shards = plan_shards(
+        n,
+        seed=resolve_seed(seed),
+        max_turns=max_turns,
+        battle_prize_card_reward=battle_prize_card_reward,
+        shard_size=shard_size,
+        include_deals=include_deals,
+        cache_path=cache_path,
+    )
+    yield from iter_shards(shards, workers=workers)
+
+
+def iter_shards(
+    shards: list[ShardSpec], workers: int | None = None
+) -> Iterator[SimulationSummary]:
+    """Simulate planned shards across a process pool, yielding summaries in shard order."""
+    workers = workers or os.cpu_count() or 1
+
+    ## -- small runs are not worth the cost of starting processes
+    if workers == 1 or len(shards) <= 1:
+        for spec in shards:
+            yield simulate_shard(spec)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(simulate_shard, shards)
+
+
+def concat_summaries(summaries: list[SimulationSummary]) -> SimulationSummary:
+    assert len(summaries) > 0, "At least one summary is required."
+    has_deals = summaries[0]["deals"] is not None
+    return SimulationSummary(
+        seed=summaries[0]["seed"],
+        game_index=np.concatenate([s["game_index"] for s in summaries]),
+        completed_turns=np.concatenate([s["completed_turns"] for s in summaries]),
+        end_status=np.concatenate([s["end_status"] for s in summaries]),
+        player_scores=np.concatenate([s["player_scores"] for s in summaries]),
+        deals=np.concatenate([s["deals"] for s in summaries]) if has_deals else None,  # type: ignore
+    )
+
+
+def run_simulations(
+    n: int,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    include_deals: bool = False,
+    cache_path: str | None = None,
+) -> SimulationSummary:
+    """
+    Simulate `n` two-player games across a process pool.
+
+    Each game is summarized by its turn count, end status code (see
+    `war_probs.batch.END_STATUS_LABELS`) and final scores. Results depend only on
+    `seed` and `shard_size`, never on the number of `workers`. With `cache_path`,
+    deals already in that `war_probs.cache.OutcomeCache` are not simulated again.
+    """
+    return concat_summaries(
+        list(
+            iter_simulations(
+                n,
+                workers=workers,
+                seed=seed,
+                max_turns=max_turns,
+                battle_prize_card_reward=battle_prize_card_reward,
+                shard_size=shard_size,
+                include_deals=include_deals,
+                cache_path=cache_path,
+            )
+        )
+    )
@@ -0,0 +1,548 @@
+"""
+Local simulation service, so every notebook and script on a box shares one process pool.
+
+Jobs are submitted over HTTP, on a TCP port or a Unix socket, and split into shards
+exactly as `war_probs.runner.run_simulations` would split them. Shards from concurrent
+jobs are coalesced into larger lockstep batches for the pool, progress and partial
+aggregates stream back as newline-delimited JSON, and identical seeded jobs share a
+single run. Usage:
+
+    python -m war_probs.service --port 8765
+    python -m war_probs.service --unix-socket /tmp/war-probs.sock
+
+Endpoints:
+
+    POST /jobs              submit a job, e.g., {"n": 100000, "seed": 42}
+    POST /simulate          submit a job and stream its events until it finishes
+    GET  /jobs/<id>         latest event of a job
+    GET  /jobs/<id>/events  stream a job's events until it finishes
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, TypedDict
+from uuid import uuid4
+
+from war_probs.runner import (
+    DEFAULT_SHARD_SIZE,
+    ShardSpec,
+    SimulationSummary,
+    plan_shards,
+    resolve_seed,
+    simulate_shards,
+)
+from war_probs.stats import OutcomeTally, TurnCountSummary
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+
+## -- shards are coalesced into batches of up to this many games
+DEFAULT_BATCH_GAMES: int = 20_000
+
+## -- once idle, wait this long for concurrent requests before dispatching a batch
+DEFAULT_COALESCE_SECONDS: float = 0.005
+
+## -- finished jobs kept for status requests and deduplication
+DEFAULT_MAX_FINISHED_JOBS: int = 1_024
+
+_MAX_HEADER_LINES: int = 100
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+EventType = Literal["progress", "done", "failed"]
+
+
+class JobSettings(TypedDict):
+    n: int
+    seed: int
+    max_turns: int
+    battle_prize_card_reward: int
+    shard_size: int
+
+
+class JobAggregate(TypedDict):
+    end_status_counts: dict[str, int]
+    player_wins: list[int]
+    turns: TurnCountSummary | None
+
+
+class JobEvent(TypedDict):
+    event: EventType
+    job_id: str
+    status: JobStatus
+    settings: JobSettings
+    completed_games: int
+    aggregate: JobAggregate
+    error: str | None
+
+
+## ------------------------------------------------- ##
+## ---- JOBS --------------------------------------- ##
+## ------------------------------------------------- ##
+
+
+def parse_job_settings(payload: object) -> tuple[JobSettings, bool]:
+    """
+    Validate a job request, returning its settings and whether it was seeded. Requests
+    come from untrusted clients, so invalid ones raise a `ValueError`.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Job request must be a JSON object.")
+    unknown = set(payload) - set(JobSettings.__annotations__)
+    if unknown:
+        raise ValueError(f"Unknown job settings: {sorted(unknown)}.")
+
+    settings = JobSettings(
+        n=payload.get("n", 0),
+        seed=payload.get("seed"),  # type: ignore
+        max_turns=payload.get("max_turns", 5_000),
+        battle_prize_card_reward=payload.get("battle_prize_card_reward", 3),
+        shard_size=payload.get("shard_size", DEFAULT_SHARD_SIZE),
+    )
+    for name, value in settings.items():
+        if name == "seed" and value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(
+                f"Job setting '{name}' must be a non-negative integer, got '{value}'."
+            )
+    if settings["n"] <= 0:
+        raise ValueError("Job must simulate at least 1 game.")
+    if settings["shard_size"] <= 0:
+        raise ValueError("Shard size must be positive.")
+
+    seeded = settings["seed"] is not None
+    settings["seed"] = resolve_seed(settings["seed"])
+    return settings, seeded
+
+
+class Job:
+    def __init__(self, settings: JobSettings) -> None:
+        self.id = uuid4().hex
+        self.settings = settings
+        self.pending: deque[ShardSpec] = deque(
+            plan_shards(
+                settings["n"],
+                seed=settings["seed"],
+                max_turns=settings["max_turns"],
+                battle_prize_card_reward=settings["battle_prize_card_reward"],
+                shard_size=settings["shard_size"],
+            )
+        )
+        self.status: JobStatus = "queued"
+        self.error: str | None = None
+
+        ## -- partial aggregates, which do not depend on the order shards finish in
+        self.tally = OutcomeTally()
+
+        self._subscribers: set[asyncio.Queue[JobEvent]] = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def add(self, summary: SimulationSummary) -> None:
+        self.tally.add(summary)
+        if self.tally.num_games == self.settings["n"]:
+            self.status = "done"
+
+    def fail(self, error: str) -> None:
+        self.pending.clear()
+        self.status = "failed"
+        self.error = error
+
+    def event(self) -> JobEvent:
+        event_type: EventType = "progress"
+        if self.status == "done":
+            event_type = "done"
+        elif self.status == "failed":
+            event_type = "failed"
+
+        turn_counts = self.tally.turn_counts
+        return JobEvent(
+            event=event_type,
+            job_id=self.id,
+            status=self.status,
+            settings=self.settings,
+            completed_games=self.tally.num_games,
+            aggregate=JobAggregate(
+                end_status_counts=self.tally.end_status_summary(),
+                player_wins=list(self.tally.player_wins),
+                turns=turn_counts.summary() if turn_counts.count > 0 else None,
+            ),
+            error=self.error,
+        )
+
+    def subscribe(self) -> "asyncio.Queue[JobEvent]":
+        """Queue of this job's events, starting with its current state."""
+        queue: asyncio.Queue[JobEvent] = asyncio.Queue()
+        queue.put_nowait(self.event())
+        if not self.finished:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[JobEvent]") -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self) -> None:
+        event = self.event()
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        if self.finished:
+            self._subscribers.clear()
+
+
+## ------------------------------------------------- ##
+## ---- SCHEDULER ---------------------------------- ##
+## ------------------------------------------------- ##
+
+
+class SimulationService:
+    def __init__(
+        self,
+        workers: int | None = None,
+        batch_games: int = DEFAULT_BATCH_GAMES,
+        coalesce_seconds: float = DEFAULT_COALESCE_SECONDS,
+        max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_games = batch_games
+        self.coalesce_seconds = coalesce_seconds
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._seeded_jobs: dict[tuple, str] = {}
+
+        ## -- jobs with shards still to dispatch, served round-robin
+        self._queue: deque[Job] = deque()
+
+        self._pool: ProcessPoolExecutor | None = None
+        self._work_available = asyncio.Event()
+        self._free_workers = asyncio.Semaphore(self.workers)
+        self._dispatcher: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        ## -- forked workers would inherit open client sockets and keep them from closing
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver")
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        for batch in list(self._batches):
+            batch.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def submit(self, settings: JobSettings, seeded: bool) -> tuple[Job, bool]:
+        """Queue a job, or return the existing run of an identical seeded job."""
+        key = tuple(settings.values())
+        if seeded and key in self._seeded_jobs:
+            existing = self.jobs.get(self._seeded_jobs[key])
+            if existing is not None and existing.status != "failed":
+                return existing, True
+
+        job = Job(settings)
+        self.jobs[job.id] = job
+        if seeded:
+            self._seeded_jobs[key] = job.id
+        self._queue.append(job)
+        self._work_available.set()
+        self._forget_finished_jobs()
+        return job, False
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+            job = self.jobs.pop(job_id)
+            key = tuple(job.settings.values())
+            if self._seeded_jobs.get(key) == job_id:
+                del self._seeded_jobs[key]
+
+    def _next_batch(self) -> list[tuple[Job, ShardSpec]]:
+        """Take shards round-robin across jobs with the same game settings."""
+        batch: list[tuple[Job, ShardSpec]] = []
+        batch_settings: tuple[int, int] | None = None
+        num_games: int = 0
+        skipped: list[Job] = []
+
+        while self._queue and num_games < self.batch_games:
+            job = self._queue.popleft()
+            if not job.pending:
+                continue
+
+            job_settings = (job.settings["max_turns"], job.settings["battle_prize_card_reward"])
+            batch_settings = batch_settings or job_settings
+            if job_settings != batch_settings:
+                skipped.append(job)
+                continue
+            if batch and num_games + job.pending[0].n_games > self.batch_games:
+                self._queue.appendleft(job)
+                break
+
+            spec = job.pending.popleft()
+            batch.append((job, spec))
+            num_games += spec.n_games
+            if job.pending:
+                self._queue.append(job)
+
+        self._queue.extendleft(reversed(skipped))
+        return batch
+
+    async def _dispatch(self) -> None:
+        while True:
+            if not self._queue:
+                self._work_available.clear()
+                await self._work_available.wait()
+                ## -- give concurrent small requests a chance to join the first batch
+                await asyncio.sleep(self.coalesce_seconds)
+
+            await self._free_workers.acquire()
+            batch = self._next_batch()
+            if not batch:
+                self._free_workers.release()
+                continue
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[Job, ShardSpec]]) -> None:
+        jobs = list({job.id: job for job, _ in batch}.values())
+        for job in jobs:
+            if job.status == "queued":
+                job.status = "running"
+
+        try:
+            await self._run_shards(batch, jobs)
+        finally:
+            self._free_workers.release()
+
+        for job in jobs:
+            job.publish()
+
+    async def _run_shards(self, batch: list[tuple[Job, ShardSpec]], jobs: list[Job]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            summaries = await loop.run_in_executor(
+                self._pool, simulate_shards, [spec for _, spec in batch]
+            )
+        except Exception as error:
+            if len(jobs) == 1:
+                jobs[0].fail(f"{type(error).__name__}: {error}")
+                return
+            ## -- rerun every job's shards on their own, so only the failing jobs fail
+            for job in jobs:
+                await self._run_shards([shard for shard in batch if shard[0] is job], [job])
+            return
+
+        for (job, _), summary in zip(batch, summaries):
+            if not job.finished:
+                job.add(summary)
+
+    ## ------------------------------------------------- ##
+    ## ---- HTTP ------------------------------------- ##
+    ## ------------------------------------------------- ##
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+                await self._route(method, path, body, writer)
+            except (AssertionError, ValueError) as error:
+                _write_json(writer, 400, {"error": str(error)})
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        parts = [part for part in path.split("?")[0].split("/") if part]
+
+        if method == "POST" and parts in (["jobs"], ["simulate"]):
+            settings, seeded = parse_job_settings(json.loads(body or b"{}"))
+            job, deduplicated = self.submit(settings, seeded)
+            if parts == ["jobs"]:
+                _write_json(writer, 202, {"job_id": job.id, "deduplicated": deduplicated})
+            else:
+                await _stream_events(job, writer)
+            return
+
+        if method == "GET" and len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                _write_json(writer, 404, {"error": f"Unknown job '{parts[1]}'."})
+            elif len(parts) == 2:
+                _write_json(writer, 200, job.event())
+            elif parts[2] == "events":
+                await _stream_events(job, writer)
+            else:
+                _write_json(writer, 404, {"error": f"Unknown path '{path}'."})
+            return
+
+        _write_json(writer, 404, {"error": f"Unknown path '{path}'."})
+
+
+_REASONS: dict[int, str] = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found"}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise ValueError("Malformed HTTP request line.")
+    method, path, _ = request_line
+
+    content_length: int = 0
+    for _ in range(_MAX_HEADER_LINES):
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    else:
+        raise ValueError("Too many HTTP headers.")
+
+    body = await reader.readexactly(content_length) if content_length else b""
+    return method.upper(), path, body
+
+
+def _write_head(writer: asyncio.StreamWriter, status: int, headers: dict[str, str]) -> None:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}", "Connection: close"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+def _write_json(writer: asyncio.StreamWriter, status: int, payload: object) -> None:
+    body = json.dumps(payload).encode()
+    _write_head(
+        writer,
+        status,
+        {"Content-Type": "application/json", "Content-Length": str(len(body))},
+    )
+    writer.write(body)
+
+
+async def _stream_events(job: Job, writer: asyncio.StreamWriter) -> None:
+    """Write a job's events as newline-delimited JSON until it finishes."""
+    ## -- the response ends when the connection closes, so no length is needed
+    _write_head(writer, 200, {"Content-Type": "application/x-ndjson"})
+    queue = job.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            writer.write(json.dumps(event).encode() + b"\n")
+            await writer.drain()
+            if event["event"] != "progress":
+                return
+    finally:
+        job.unsubscribe(queue)
+
+
+## ------------------------------------------------- ##
+## ---- SERVER AND CLIENT -------------------------- ##
+## ------------------------------------------------- ##
+
+
+async def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_socket: str | None = None,
+    workers: int | None = None,
+    batch_games: int = DEFAULT_BATCH_GAMES,
+    coalesce_seconds: float = DEFAULT_COALESCE_SECONDS,
+) -> None:
+    service = SimulationService(
+        workers=workers, batch_games=batch_games, coalesce_seconds=coalesce_seconds
+    )
+    await service.start()
+    try:
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(service.handle_connection, unix_socket)
+            print(f"> Serving simulations on unix socket {unix_socket}")
+        else:
+            server = await asyncio.start_server(service.handle_connection, host, port)
+            print(f"> Serving simulations on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def stream_simulation(
+    n: int,
+    seed: int | None = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_socket: str | None = None,
+    **settings: int,
+) -> Iterator[JobEvent]:
+    """Submit a job to a running service and yield its events until it finishes."""
+    if unix_socket is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(unix_socket)
+    else:
+        connection = socket.create_connection((host, port))
+
+    body = json.dumps({"n": n, "seed": seed, **settings}).encode()
+    request = (
+        f"POST /simulate HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    ).encode("latin-1")
+
+    with connection, connection.makefile("rb") as response:
+        connection.sendall(request + body)
+        status = int(response.readline().split()[1])
+        while response.readline().strip():
+            pass
+        if status != 200:
+            raise ValueError(json.loads(response.read())["error"])
+        for line in response:
+            yield json.loads(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m war_probs.service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", help="Serve on a Unix socket instead of TCP.")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--batch-games", type=int, default=DEFAULT_BATCH_GAMES)
+    parser.add_argument(
+        "--coalesce-ms", type=float, default=DEFAULT_COALESCE_SECONDS * 1000
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(
+            serve(
+                host=args.host,
+                port=args.port,
+                unix_socket=args.unix_socket,
+                workers=args.workers,
+                batch_games=args.batch_games,
+                coalesce_seconds=args.coalesce_ms / 1000,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
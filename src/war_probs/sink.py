@@ -0,0 +1,150 @@
+"""
+Streaming Parquet writer for simulation summaries.
+
+Summaries from `war_probs.runner.iter_simulations` are buffered up to a fixed number of
+rows and flushed as numbered part files in a dataset directory, so memory stays flat
+however many games a run contains.
+
+With `include_features`, deal features (see `war_probs.features`) are computed for each
+shard as it is written, and every part file is sorted by `CLUSTER_COLUMNS` into small
+row groups, whose statistics let filtered scans skip most of the file.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from war_probs.batch import END_STATUS_LABELS
+from war_probs.features import CLUSTER_COLUMNS, deal_feature_frame
+from war_probs.runner import SimulationSummary, iter_simulations
+
+DEFAULT_ROWS_PER_FILE: int = 1_000_000
+FEATURE_ROW_GROUP_SIZE: int = 50_000
+
+END_STATUS_DTYPE = pl.Enum(list(END_STATUS_LABELS))
+
+
+def summary_to_frame(
+    summary: SimulationSummary, include_deals: bool = False, include_features: bool = False
+) -> pl.DataFrame:
+    """
+    Summary schema: id, turns, end status, per-player scores and seed, plus the optional
+    deal and deal features.
+    """
+    n_games = summary["game_index"].size
+    columns: dict[str, pl.Series] = {
+        "id": pl.Series(summary["game_index"], dtype=pl.Int64),
+        "turns": pl.Series(summary["completed_turns"], dtype=pl.Int32),
+        "end_status": pl.Series(
+            np.asarray(END_STATUS_LABELS)[summary["end_status"]], dtype=END_STATUS_DTYPE
+        ),
+    }
+    for player_num in range(summary["player_scores"].shape[1]):
+        columns[f"score_{player_num}"] = pl.Series(
+            summary["player_scores"][:, player_num], dtype=pl.UInt8
+        )
+    columns["seed"] = pl.Series(np.full(n_games, summary["seed"], dtype=np.uint64))
+
+    if include_deals:
+        assert summary["deals"] is not None, "Summary was simulated without deals."
+        ## -- fixed-width array of card codes in dealt order
+        columns["deal"] = pl.Series(summary["deals"])
+
+    frame = pl.DataFrame(columns)
+    if include_features:
+        assert summary["deals"] is not None, "Summary was simulated without deals."
+        frame = pl.concat([frame, deal_feature_frame(summary["deals"])], how="horizontal")
+    return frame
+
+
+class ParquetResultSink:
+    """Append simulation summaries to a directory of Parquet part files."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        include_deals: bool = False,
+        rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+        include_features: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.include_deals = include_deals
+        self.rows_per_file = rows_per_file
+        self.include_features = include_features
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._num_parts = len(list(self.directory.glob("part-*.parquet")))
+        self._buffer: list[pl.DataFrame] = []
+        self._buffered_rows: int = 0
+
+    def write(self, summary: SimulationSummary) -> Path | None:
+        """Buffer a summary, returning the part file written if the buffer was flushed."""
+        frame = summary_to_frame(
+            summary, include_deals=self.include_deals, include_features=self.include_features
+        )
+        self._buffer.append(frame)
+        self._buffered_rows += frame.height
+
+        if self._buffered_rows >= self.rows_per_file:
+            return self.flush()
+        return None
+
+    def write_all(self, summaries: Iterable[SimulationSummary]) -> None:
+        for summary in summaries:
+            self.write(summary)
+
+    def flush(self) -> Path | None:
+        if self._buffered_rows == 0:
+            return None
+
+        part_path = self.directory / f"part-{self._num_parts:05d}.parquet"
+        if self.include_features:
+            pl.concat(self._buffer).sort(list(CLUSTER_COLUMNS)).write_parquet(
+                part_path, row_group_size=FEATURE_ROW_GROUP_SIZE
+            )
+        else:
+            pl.concat(self._buffer, rechunk=False).write_parquet(part_path)
+
+        self._num_parts += 1
+        self._buffer = []
+        self._buffered_rows = 0
+        return part_path
+
+    def close(self) -> Path | None:
+        return self.flush()
+
+    def __enter__(self) -> "ParquetResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_simulations(
+    directory: str | Path,
+    n: int,
+    include_deals: bool = False,
+    rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+    include_features: bool = False,
+    **simulation_kwargs,
+) -> Path:
+    """Run `n` simulations and stream their summaries to a Parquet dataset."""
+    with ParquetResultSink(
+        directory,
+        include_deals=include_deals,
+        rows_per_file=rows_per_file,
+        include_features=include_features,
+    ) as sink:
+        ## -- features are computed from the deals, whether or not the deals are kept
+        sink.write_all(
+            iter_simulations(
+                n, include_deals=include_deals or include_features, **simulation_kwargs
+            )
+        )
+    return sink.directory
+
+
+def scan_results(directory: str | Path) -> pl.LazyFrame:
+    return pl.scan_parquet(Path(directory) / "part-*.parquet")
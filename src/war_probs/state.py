@@ -0,0 +1,136 @@
+"""
+Forkable mid-game state for counterfactual analysis.
+
+A `GameState` is the players' encoded hands (see `war_probs.encoded.RingHands`) and the
+number of turns played. Forking is O(1): a fork shares its parent's hands and both are
+marked copy-on-write, so the hands are only copied by whichever state changes them
+first, and branches that are only inspected never copy at all. Counterfactuals are made
+by swapping cards between positions, which keeps every deal a valid deck, e.g., "what if
+player 0's next card had been the king of spades":
+
+    state = Game(cards=cards).initial_state()
+    state.advance_to(120)
+    branch = state.fork()
+    branch.swap((0, 0), branch.find(get_card("king", "spades")))
+    branch.run()
+"""
+
+from typing import Literal, TypedDict
+
+from war_probs.cards import Card, CardCode, encode_card
+from war_probs.encoded import (
+    PlayerNum,
+    RingHands,
+    TurnSummary,
+    deal_encoded_hands,
+    play_turn_encoded,
+)
+
+## -- (player, position in hand), position 0 being the next card played
+CardPosition = tuple[PlayerNum, int]
+
+
+class BranchOutcome(TypedDict):
+    completed_turns: int
+    player_scores: list[int]
+    end_status: Literal["winner", "draw"]
+
+
+class GameState:
+    """Hands and turn count of a game in progress, forked in O(1) and copied on write."""
+
+    __slots__ = ("_hands", "_shared", "turn", "battle_prize_card_reward")
+
+    def __init__(
+        self, hands: RingHands, turn: int = 0, battle_prize_card_reward: int = 3
+    ) -> None:
+        self._hands = hands
+        ## -- hands may be shared with forks, and are copied before they change
+        self._shared: bool = False
+        self.turn = turn
+        self.battle_prize_card_reward = battle_prize_card_reward
+
+    @classmethod
+    def deal(
+        cls,
+        codes: list[CardCode],
+        num_players: int = 2,
+        battle_prize_card_reward: int = 3,
+    ) -> "GameState":
+        return cls(
+            deal_encoded_hands(list(codes), num_players),
+            battle_prize_card_reward=battle_prize_card_reward,
+        )
+
+    def fork(self) -> "GameState":
+        """An independent branch of this state, sharing its hands until either changes."""
+        self._shared = True
+        branch = GameState(self._hands, self.turn, self.battle_prize_card_reward)
+        branch._shared = True
+        return branch
+
+    def _writable_hands(self) -> RingHands:
+        if self._shared:
+            self._hands = self._hands.copy()
+            self._shared = False
+        return self._hands
+
+    @property
+    def is_over(self) -> bool:
+        return len(self._hands.active) <= 1
+
+    @property
+    def sizes(self) -> list[int]:
+        return list(self._hands.sizes)
+
+    def codes(self) -> list[list[CardCode]]:
+        return self._hands.to_lists()
+
+    def hands(self) -> list[list[Card]]:
+        return self._hands.to_cards()
+
+    def find(self, card: Card) -> CardPosition:
+        """Position of the first copy of `card` in the players' hands."""
+        code = encode_card(card)
+        for player_num, hand in enumerate(self._hands.to_lists()):
+            if code in hand:
+                return player_num, hand.index(code)
+        raise ValueError(f"{card} is not in any player's hand.")
+
+    def _slot(self, position: CardPosition) -> int:
+        player_num, index = position
+        hands = self._hands
+        size = hands.sizes[player_num]
+        assert 0 <= index < size, f"Player {player_num} holds {size} cards, no position {index}."
+        offset = (hands.heads[player_num] + index) % hands.capacity
+        return player_num * hands.capacity + offset
+
+    def swap(self, first: CardPosition, second: CardPosition) -> None:
+        """Exchange the cards at two positions, in the same or different hands."""
+        first_slot, second_slot = self._slot(first), self._slot(second)
+        slots = self._writable_hands().slots
+        slots[first_slot], slots[second_slot] = slots[second_slot], slots[first_slot]
+
+    def step(self) -> TurnSummary:
+        """Play one turn. Tied wars that no player can continue raise a `ValueError`."""
+        assert not self.is_over, "Game is already over."
+        hands = self._writable_hands()
+        turn_summary = play_turn_encoded(hands, self.battle_prize_card_reward)
+        self.turn += 1
+        return turn_summary
+
+    def advance_to(self, turn: int) -> None:
+        """Play turns until `turn` turns have been played, or the game ends."""
+        while self.turn < turn and not self.is_over:
+            self.step()
+
+    def run(self, max_turns: int = 5_000) -> BranchOutcome:
+        """Play on to the end, stopping as `Game.play` does after `max_turns` turns."""
+        while not self.is_over and self.turn <= max_turns:
+            self.step()
+
+        return BranchOutcome(
+            completed_turns=self.turn,
+            player_scores=self.sizes,
+            end_status="draw" if not self.is_over else "winner",
+        )
@@ -0,0 +1,222 @@
+"""
+Mergeable streaming statistics for turn count distributions.
+
+Turn counts are small non-negative integers, bounded by `max_turns + 1`, so keeping a
+count per distinct turn count is both compact and exact: moments, fixed-bin histograms
+and quantiles are all computed from it without holding individual games in memory.
+Accumulators from different workers or shards merge by adding their counts. Empty
+accumulators, e.g., from shards without a finished game, merge like any other, but
+raise a `ValueError` when asked for a statistic.
+"""
+
+import math
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.batch import END_STATUS_LABELS, STATUS_WINNER
+
+DEFAULT_CAPACITY: int = 5_002
+
+
+class TurnCountSummary(TypedDict):
+    count: int
+    mean: float
+    median: float
+    std: float
+    min: int
+    max: int
+    q1: float
+    q3: float
+    iqr: float
+
+
+class TurnCountAccumulator:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        ## -- counts[t] is the number of games lasting exactly t turns
+        self.counts = np.zeros(capacity, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, turn_counts) -> "TurnCountAccumulator":
+        accumulator = cls()
+        accumulator.add_many(turn_counts)
+        return accumulator
+
+    def _ensure_capacity(self, max_value: int) -> None:
+        if max_value >= self.counts.size:
+            grown = np.zeros(max(max_value + 1, 2 * self.counts.size), dtype=np.int64)
+            grown[: self.counts.size] = self.counts
+            self.counts = grown
+
+    def add(self, turns: int) -> None:
+        self._ensure_capacity(turns)
+        self.counts[turns] += 1
+
+    def add_many(self, turn_counts) -> None:
+        turn_counts = np.asarray(turn_counts, dtype=np.int64)
+        if turn_counts.size == 0:
+            return
+        assert turn_counts.min() >= 0, "Turn counts must be non-negative."
+        self._ensure_capacity(int(turn_counts.max()))
+        self.counts[: int(turn_counts.max()) + 1] += np.bincount(turn_counts)
+
+    def merge(self, other: "TurnCountAccumulator") -> "TurnCountAccumulator":
+        """Add another accumulator's games into this one, in place."""
+        self._ensure_capacity(other.counts.size - 1)
+        self.counts[: other.counts.size] += other.counts
+        return self
+
+    ## -- exact moments, using integer sums
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def _values(self) -> np.ndarray:
+        return np.arange(self.counts.size, dtype=np.int64)
+
+    def _require_games(self) -> int:
+        count = self.count
+        if count == 0:
+            raise ValueError("Turn count statistics are undefined without any games.")
+        return count
+
+    @property
+    def total(self) -> int:
+        return int(self.counts @ self._values())
+
+    @property
+    def mean(self) -> float:
+        return self.total / self._require_games()
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, as `np.std`."""
+        count = self._require_games()
+        sum_squares = int(self.counts @ self._values() ** 2)
+        return math.sqrt(max(sum_squares * count - self.total**2, 0)) / count
+
+    @property
+    def min(self) -> int:
+        self._require_games()
+        return int(np.flatnonzero(self.counts)[0])
+
+    @property
+    def max(self) -> int:
+        self._require_games()
+        return int(np.flatnonzero(self.counts)[-1])
+
+    ## -- quantiles and histograms
+
+    def quantile(self, q: float) -> float:
+        """Quantile with linear interpolation, matching `np.percentile(values, 100 * q)`."""
+        assert 0 <= q <= 1, f"Quantile must be between 0 and 1, got '{q}'."
+        self._require_games()
+        cumulative = np.cumsum(self.counts)
+        position = (cumulative[-1] - 1) * q
+        lower_rank = math.floor(position)
+        lower = int(np.searchsorted(cumulative, lower_rank, side="right"))
+        upper = int(np.searchsorted(cumulative, lower_rank + 1, side="right"))
+        if lower_rank + 1 >= cumulative[-1]:
+            upper = lower
+        return lower + (position - lower_rank) * (upper - lower)
+
+    def distinct_values(self) -> tuple[np.ndarray, np.ndarray]:
+        """Turn counts seen, with the number of games for each."""
+        values = np.flatnonzero(self.counts)
+        return values, self.counts[values]
+
+    def histogram(self, bins: int = 50) -> tuple[np.ndarray, np.ndarray]:
+        """Fixed-bin histogram over the observed range, as `np.histogram(values, bins)`."""
+        values, weights = self.distinct_values()
+        return np.histogram(values, bins=bins, weights=weights)
+
+    def summary(self) -> TurnCountSummary:
+        q1 = self.quantile(0.25)
+        q3 = self.quantile(0.75)
+        return TurnCountSummary(
+            count=self.count,
+            mean=self.mean,
+            median=self.quantile(0.5),
+            std=self.std,
+            min=self.min,
+            max=self.max,
+            q1=q1,
+            q3=q3,
+            iqr=q3 - q1,
+        )
+
+
+## ------------------------------------------------- ##
+## ---- OUTCOMES OF SIMULATION SUMMARIES ----------- ##
+## ------------------------------------------------- ##
+
+
+class OutcomeTallyState(TypedDict):
+    num_games: int
+    end_status_counts: list[int]
+    player_wins: list[int]
+    ## -- games ending with a winner, by turn count
+    turn_counts: dict[str, int]
+
+
+class OutcomeTally:
+    """
+    End statuses, player wins and winning turn counts of two-player simulation summaries
+    (see `war_probs.runner.SimulationSummary`). Tallies are sums, so they merge in any order.
+    """
+
+    def __init__(self) -> None:
+        self.num_games: int = 0
+        self.end_status_counts: list[int] = [0] * len(END_STATUS_LABELS)
+        self.player_wins: list[int] = [0, 0]
+        self.turn_counts = TurnCountAccumulator()
+
+    def add(self, summary) -> None:
+        end_status = summary["end_status"]
+        winners = end_status == STATUS_WINNER
+        counts = np.bincount(end_status, minlength=len(END_STATUS_LABELS)).tolist()
+        for status, count in enumerate(counts):
+            self.end_status_counts[status] += count
+        for player_num in range(len(self.player_wins)):
+            self.player_wins[player_num] += int(
+                np.count_nonzero(winners & (summary["player_scores"][:, player_num] > 0))
+            )
+        self.turn_counts.add_many(summary["completed_turns"][winners])
+        self.num_games += end_status.size
+
+    def merge(self, other: "OutcomeTally") -> "OutcomeTally":
+        """Add another tally into this one, in place."""
+        self.num_games += other.num_games
+        for status, count in enumerate(other.end_status_counts):
+            self.end_status_counts[status] += count
+        for player_num, wins in enumerate(other.player_wins):
+            self.player_wins[player_num] += wins
+        self.turn_counts.merge(other.turn_counts)
+        return self
+
+    def end_status_summary(self) -> dict[str, int]:
+        return dict(zip(END_STATUS_LABELS, self.end_status_counts))
+
+    def to_state(self) -> OutcomeTallyState:
+        """JSON-compatible state, e.g., for checkpoints."""
+        values, counts = self.turn_counts.distinct_values()
+        return OutcomeTallyState(
+            num_games=self.num_games,
+            end_status_counts=list(self.end_status_counts),
+            player_wins=list(self.player_wins),
+            turn_counts={
+                str(value): count for value, count in zip(values.tolist(), counts.tolist())
+            },
+        )
+
+    @classmethod
+    def from_state(cls, state: OutcomeTallyState) -> "OutcomeTally":
+        tally = cls()
+        tally.num_games = state["num_games"]
+        tally.end_status_counts = list(state["end_status_counts"])
+        tally.player_wins = list(state["player_wins"])
+        for value, count in state["turn_counts"].items():
+            tally.turn_counts._ensure_capacity(int(value))
+            tally.turn_counts.counts[int(value)] = count
+        return tally
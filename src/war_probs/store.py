@@ -0,0 +1,293 @@
+"""
+Append-only, fixed-width binary store of two-player game records.
+
+Parquet (see `war_probs.sink`) is the exchange format. This store is for repeated
+analysis over very large corpora: every record is a fixed number of bytes, so a store
+of any size is opened as a NumPy `memmap` without reading it, and filters and
+aggregates run chunk by chunk over zero-copy views of the file.
+
+A store is a 64 byte header recording the game settings, followed by records holding
+the game id, run seed, turns, end status, scores and the dealt permutation of card codes
+(one byte per card). Appends take an exclusive `flock` on the file, so worker processes
+can write shards to the same store concurrently; records then land in completion order,
+and `id` identifies each game. Usage:
+
+    python -m war_probs.store write results/run-42.bin 500000000 --seed 42
+    python -m war_probs.store summary results/run-42.bin
+"""
+
+import argparse
+import fcntl
+import os
+import struct
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.cards import DECK_LENGTH
+from war_probs.game import Game, GameResult
+from war_probs.runner import (
+    DEFAULT_SHARD_SIZE,
+    ShardSpec,
+    SimulationSummary,
+    plan_shards,
+    resolve_seed,
+    simulate_shard,
+)
+from war_probs.stats import OutcomeTally
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("id", "<i8"),
+        ("seed", "<u8"),
+        ("turns", "<i4"),
+        ("end_status", "i1"),
+        ("scores", "u1", (2,)),
+        ("deal", "u1", (DECK_LENGTH,)),
+    ]
+)
+
+DEFAULT_CHUNK_RECORDS: int = 1_000_000
+
+_MAGIC: bytes = b"WARPROBS"
+_STORE_VERSION: int = 1
+## -- magic, version, record size, max turns, battle prize card reward, padded to 64 bytes
+_HEADER = struct.Struct("<8s4I40x")
+HEADER_SIZE: int = _HEADER.size
+
+
+class StoreSettings(TypedDict):
+    max_turns: int
+    battle_prize_card_reward: int
+
+
+def _pack_header(settings: StoreSettings) -> bytes:
+    return _HEADER.pack(
+        _MAGIC,
+        _STORE_VERSION,
+        RECORD_DTYPE.itemsize,
+        settings["max_turns"],
+        settings["battle_prize_card_reward"],
+    )
+
+
+def read_settings(path: str | Path) -> StoreSettings:
+    with open(path, "rb") as file:
+        magic, version, record_size, max_turns, reward = _HEADER.unpack(
+            file.read(HEADER_SIZE)
+        )
+    assert magic == _MAGIC, f"'{path}' is not a game record store."
+    assert version == _STORE_VERSION, f"Unsupported store version '{version}'."
+    assert (
+        record_size == RECORD_DTYPE.itemsize
+    ), f"Store records are {record_size} bytes, expected {RECORD_DTYPE.itemsize}."
+    return StoreSettings(max_turns=max_turns, battle_prize_card_reward=reward)
+
+
+def summary_to_records(summary: SimulationSummary) -> np.ndarray:
+    assert summary["deals"] is not None, "Summary was simulated without deals."
+    records = np.empty(summary["game_index"].size, dtype=RECORD_DTYPE)
+    records["id"] = summary["game_index"]
+    records["seed"] = summary["seed"]
+    records["turns"] = summary["completed_turns"]
+    records["end_status"] = summary["end_status"]
+    records["scores"] = summary["player_scores"]
+    records["deal"] = summary["deals"]
+    return records
+
+
+def append_records(path: str | Path, records: np.ndarray, settings: StoreSettings) -> None:
+    """
+    Append records under an exclusive lock, creating the store if needed. The header is
+    written by whichever writer finds the file empty, and checked by every other one.
+    A partial record left by a writer that crashed mid-append is truncated first, so
+    the new records stay aligned.
+    """
+    assert records.dtype == RECORD_DTYPE, "Records must use `RECORD_DTYPE`."
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        size = os.fstat(fd).st_size
+        ## -- only one writer holds the lock, so a partial header or record was torn by a crash
+        if size < HEADER_SIZE:
+            os.ftruncate(fd, 0)
+            os.write(fd, _pack_header(settings))
+        else:
+            assert (
+                read_settings(path) == settings
+            ), f"'{path}' holds games played with other settings."
+            torn_bytes = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+            if torn_bytes:
+                os.ftruncate(fd, size - torn_bytes)
+
+        ## -- a single write can be short, so keep writing until the block is complete
+        block = memoryview(records.tobytes())
+        while block:
+            block = block[os.write(fd, block) :]
+    finally:
+        ## -- closing the file releases the lock
+        os.close(fd)
+
+
+class RecordStore:
+    """Read-only, memory-mapped view of a game record store."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.settings = read_settings(self.path)
+        ## -- a record still being appended by a writer, or torn by a crashed one, is left out
+        num_records = (self.path.stat().st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self.records: np.ndarray = (
+            np.memmap(
+                self.path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(num_records,),
+            )
+            if num_records > 0
+            else np.empty(0, dtype=RECORD_DTYPE)
+        )
+
+    def __len__(self) -> int:
+        return self.records.size
+
+    def chunks(self, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> Iterator[np.ndarray]:
+        """Consecutive views of the records, so only one chunk is paged in at a time."""
+        for start in range(0, len(self), chunk_records):
+            yield self.records[start : start + chunk_records]
+
+    def where(
+        self,
+        predicate: Callable[[np.ndarray], np.ndarray],
+        chunk_records: int = DEFAULT_CHUNK_RECORDS,
+    ) -> np.ndarray:
+        """
+        Positions of the records matching `predicate`, a function from a chunk of records
+        to a boolean mask, e.g., `lambda records: records["turns"] > 2_000`.
+        """
+        positions: list[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        for chunk_num, chunk in enumerate(self.chunks(chunk_records)):
+            positions.append(np.flatnonzero(predicate(chunk)) + chunk_num * chunk_records)
+        return np.concatenate(positions)
+
+    def tally(
+        self,
+        predicate: Callable[[np.ndarray], np.ndarray] | None = None,
+        chunk_records: int = DEFAULT_CHUNK_RECORDS,
+    ) -> OutcomeTally:
+        """Outcome tally of every record, or of the records matching `predicate`."""
+        tally = OutcomeTally()
+        for chunk in self.chunks(chunk_records):
+            if predicate is not None:
+                chunk = chunk[predicate(chunk)]
+            tally.add(
+                {
+                    "end_status": chunk["end_status"],
+                    "player_scores": chunk["scores"],
+                    "completed_turns": chunk["turns"],
+                }
+            )
+        return tally
+
+    def game_result(self, position: int) -> GameResult:
+        """
+        Replay the record's deal to rebuild its full `GameResult`, hands included. Tied
+        games raise a `ValueError`, as `Game.play` does.
+        """
+        record = self.records[position]
+        game = Game(
+            codes=record["deal"].tolist(),
+            max_turns=self.settings["max_turns"],
+            battle_prize_card_reward=self.settings["battle_prize_card_reward"],
+        )
+        result = game.play()
+        assert (
+            result["completed_turns"] == record["turns"]
+        ), f"Replay of record {position} does not match the stored game."
+        return result
+
+
+def _simulate_shard_to_store(spec: ShardSpec, path: str, settings: StoreSettings) -> int:
+    append_records(path, summary_to_records(simulate_shard(spec)), settings)
+    return spec.n_games
+
+
+def write_store(
+    path: str | Path,
+    n: int,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> Path:
+    """Simulate `n` two-player games, each worker appending its shards to the store."""
+    settings = StoreSettings(
+        max_turns=max_turns, battle_prize_card_reward=battle_prize_card_reward
+    )
+    shards = plan_shards(
+        n,
+        seed=resolve_seed(seed),
+        max_turns=max_turns,
+        battle_prize_card_reward=battle_prize_card_reward,
+        shard_size=shard_size,
+        include_deals=True,
+    )
+    write_shard = partial(_simulate_shard_to_store, path=str(path), settings=settings)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(shards) <= 1:
+        for spec in shards:
+            write_shard(spec)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(write_shard, shards):
+                pass
+    return Path(path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m war_probs.store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write_parser = commands.add_parser("write", help="Simulate games into a store.")
+    write_parser.add_argument("path")
+    write_parser.add_argument("n", type=int)
+    write_parser.add_argument("--seed", type=int)
+    write_parser.add_argument("--workers", type=int)
+    write_parser.add_argument("--max-turns", type=int, default=5_000)
+    write_parser.add_argument("--battle-prize-card-reward", type=int, default=3)
+    write_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+
+    summary_parser = commands.add_parser("summary", help="Tally the games in a store.")
+    summary_parser.add_argument("path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        write_store(
+            args.path,
+            args.n,
+            workers=args.workers,
+            seed=args.seed,
+            max_turns=args.max_turns,
+            battle_prize_card_reward=args.battle_prize_card_reward,
+            shard_size=args.shard_size,
+        )
+
+    store = RecordStore(args.path)
+    tally = store.tally()
+    print(f"> {len(store):,} games in {store.path}")
+    print(f"> End statuses: {tally.end_status_summary()}")
+    print(f"> Player wins: {tally.player_wins}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
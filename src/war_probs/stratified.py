@@ -0,0 +1,247 @@
+"""
+Stratified deal sampling for win and draw probabilities.
+
+Deals are grouped into strata by how many cards of each of a few values player 0 is
+dealt, e.g., `(aces, kings)` held. Every stratum's probability under a uniform shuffle
+is known exactly, so games are dealt within each stratum (see
+`war_probs.dealing.deal_with_split`) and the per-stratum rates are combined with those
+probabilities, which removes the between-strata part of the sampling variance.
+
+Games are allocated to strata proportionally, or by Neyman allocation, in proportion
+to stratum probability times its outcome's standard deviation, estimated from a pilot
+run. The reported design effect compares the stratified variance with plain sampling
+of the same number of games, and is only as large as the strata's influence on the
+outcome.
+"""
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+from typing import Literal, TypedDict
+
+import numpy as np
+
+from war_probs.batch import STATUS_DRAW, STATUS_WINNER, simulate_batch
+from war_probs.cards import CARD_VALUES, Value
+from war_probs.dealing import deal_with_split, split_probability
+from war_probs.runner import DEFAULT_SHARD_SIZE, ShardSpec, plan_shards, resolve_seed, shard_rng
+
+Allocation = Literal["proportional", "neyman"]
+
+DEFAULT_STRATUM_VALUES: tuple[int, ...] = (Value.ACE.value, Value.KING.value)
+DEFAULT_PILOT_GAMES: int = 20_000
+## -- every stratum needs two games for its variance to be estimated
+MIN_STRATUM_GAMES: int = 2
+
+OUTCOMES: tuple[str, ...] = ("player_0_wins", "player_1_wins", "draw")
+
+
+class Stratum(TypedDict):
+    held: tuple[int, ...]
+    probability: float
+    num_games: int
+    rates: dict[str, float]
+
+
+class OutcomeEstimate(TypedDict):
+    estimate: float
+    std_error: float
+    ci_lower: float
+    ci_upper: float
+    ## -- stratified variance over plain sampling variance, for the same number of games
+    design_effect: float
+
+
+class StratifiedResult(TypedDict):
+    seed: int
+    num_games: int
+    pilot_games: int
+    allocation: Allocation
+    stratum_values: tuple[int, ...]
+    strata: list[Stratum]
+    estimates: dict[str, OutcomeEstimate]
+
+
+def deal_strata(stratum_values: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray]:
+    """Every possible split of the stratum values' cards, with its probability."""
+    group_sizes = [CARD_VALUES.count(value) for value in stratum_values]
+    held = np.array(list(itertools.product(*(range(size + 1) for size in group_sizes))))
+    probabilities = split_probability(held, group_sizes)
+    return held[probabilities > 0], probabilities[probabilities > 0]
+
+
+def allocate_games(n: int, weights: np.ndarray) -> np.ndarray:
+    """
+    Split `n` games across strata in proportion to `weights`, rounding by largest
+    remainder, with at least `MIN_STRATUM_GAMES` games in every stratum.
+    """
+    assert n >= MIN_STRATUM_GAMES * weights.size, (
+        f"Need at least {MIN_STRATUM_GAMES * weights.size} games for {weights.size} strata,"
+        f" got '{n}'."
+    )
+    spare = n - MIN_STRATUM_GAMES * weights.size
+    shares = spare * weights / weights.sum()
+    games = np.floor(shares).astype(np.int64)
+    remainders = np.argsort(games - shares)[: spare - games.sum()]
+    games[remainders] += 1
+    return games + MIN_STRATUM_GAMES
+
+
+def _outcomes(end_status: np.ndarray, player_scores: np.ndarray) -> dict[str, np.ndarray]:
+    winners = end_status == STATUS_WINNER
+    return {
+        "player_0_wins": winners & (player_scores[:, 0] > 0),
+        "player_1_wins": winners & (player_scores[:, 1] > 0),
+        "draw": end_status == STATUS_DRAW,
+    }
+
+
+def _simulate_stratified_shard(
+    spec: ShardSpec, held: np.ndarray, stratum_values: tuple[int, ...]
+) -> dict[str, np.ndarray]:
+    groups = [np.flatnonzero(np.asarray(CARD_VALUES) == value) for value in stratum_values]
+    result = simulate_batch(
+        decks=deal_with_split(held, groups, shard_rng(spec.seed, spec.shard_index)),
+        max_turns=spec.max_turns,
+        battle_prize_card_reward=spec.battle_prize_card_reward,
+    )
+    return _outcomes(result["end_status"], result["player_scores"])
+
+
+def _simulate_strata(
+    shards: list[ShardSpec],
+    games_per_stratum: np.ndarray,
+    stratum_held: np.ndarray,
+    stratum_values: tuple[int, ...],
+    workers: int,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Play the games allocated to every stratum, returning each game's stratum and outcomes."""
+    strata = np.repeat(np.arange(games_per_stratum.size), games_per_stratum)
+    held = [
+        stratum_held[strata[spec.first_game : spec.first_game + spec.n_games]]
+        for spec in shards
+    ]
+    simulate = partial(_simulate_stratified_shard, stratum_values=stratum_values)
+
+    if workers == 1 or len(shards) <= 1:
+        results = [simulate(spec, shard_held) for spec, shard_held in zip(shards, held)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate, shards, held))
+    return strata, {
+        outcome: np.concatenate([result[outcome] for result in results])
+        for outcome in OUTCOMES
+    }
+
+
+def _stratum_rates(
+    strata: np.ndarray, outcome: np.ndarray, num_strata: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample mean and sample variance of an outcome within every stratum."""
+    games = np.bincount(strata, minlength=num_strata)
+    rates = np.bincount(strata, weights=outcome, minlength=num_strata) / games
+    variances = rates * (1 - rates) * games / np.maximum(games - 1, 1)
+    return rates, variances
+
+
+def run_stratified(
+    n: int,
+    allocation: Allocation = "neyman",
+    stratum_values: tuple[int, ...] = DEFAULT_STRATUM_VALUES,
+    target: str = "player_0_wins",
+    pilot_games: int = DEFAULT_PILOT_GAMES,
+    confidence: float = 0.95,
+    workers: int | None = None,
+    seed: int | None = None,
+    max_turns: int = 5_000,
+    battle_prize_card_reward: int = 3,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> StratifiedResult:
+    """
+    Estimate two-player win and draw probabilities from `n` games, stratified by how many
+    cards of each of `stratum_values` player 0 is dealt.
+
+    Neyman allocation is tuned for `target` on `pilot_games` proportionally allocated
+    games, which are not part of the estimates.
+    """
+    assert allocation in ("proportional", "neyman"), f"Unknown allocation '{allocation}'."
+    assert target in OUTCOMES, f"Unknown target outcome '{target}'."
+
+    seed = resolve_seed(seed)
+    workers = workers or os.cpu_count() or 1
+    stratum_held, stratum_probabilities = deal_strata(stratum_values)
+    num_strata = stratum_probabilities.size
+    simulate = partial(
+        _simulate_strata,
+        stratum_held=stratum_held,
+        stratum_values=stratum_values,
+        workers=workers,
+    )
+
+    ## -- pilot and main games draw from separate shard streams of the same seed
+    plan = partial(
+        plan_shards,
+        seed=seed,
+        max_turns=max_turns,
+        battle_prize_card_reward=battle_prize_card_reward,
+        shard_size=shard_size,
+    )
+    num_pilot_shards: int = 0
+    allocation_weights = stratum_probabilities
+    if allocation == "neyman":
+        pilot_shards = plan(pilot_games)
+        num_pilot_shards = len(pilot_shards)
+        pilot_strata, pilot_outcomes = simulate(
+            pilot_shards, allocate_games(pilot_games, stratum_probabilities)
+        )
+        _, pilot_variances = _stratum_rates(pilot_strata, pilot_outcomes[target], num_strata)
+        ## -- floor the deviations, so strata that looked certain in the pilot still get games
+        allocation_weights = stratum_probabilities * np.sqrt(
+            np.maximum(pilot_variances, 1 / pilot_games)
+        )
+
+    games_per_stratum = allocate_games(n, allocation_weights)
+    main_shards = [
+        spec._replace(shard_index=spec.shard_index + num_pilot_shards) for spec in plan(n)
+    ]
+    strata, outcomes = simulate(main_shards, games_per_stratum)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    estimates: dict[str, OutcomeEstimate] = {}
+    stratum_rates: dict[str, np.ndarray] = {}
+    for outcome in OUTCOMES:
+        rates, variances = _stratum_rates(strata, outcomes[outcome], num_strata)
+        stratum_rates[outcome] = rates
+        estimate = float(stratum_probabilities @ rates)
+        variance = float((stratum_probabilities**2 * variances / games_per_stratum).sum())
+        plain_variance = estimate * (1 - estimate) / n
+        estimates[outcome] = OutcomeEstimate(
+            estimate=estimate,
+            std_error=math.sqrt(variance),
+            ci_lower=estimate - z * math.sqrt(variance),
+            ci_upper=estimate + z * math.sqrt(variance),
+            design_effect=variance / plain_variance if plain_variance > 0 else math.nan,
+        )
+
+    return StratifiedResult(
+        seed=seed,
+        num_games=n,
+        pilot_games=pilot_games if allocation == "neyman" else 0,
+        allocation=allocation,
+        stratum_values=stratum_values,
+        strata=[
+            Stratum(
+                held=tuple(stratum_held[stratum].tolist()),
+                probability=float(stratum_probabilities[stratum]),
+                num_games=int(games_per_stratum[stratum]),
+                rates={
+                    outcome: float(stratum_rates[outcome][stratum]) for outcome in OUTCOMES
+                },
+            )
+            for stratum in range(num_strata)
+        ],
+        estimates=estimates,
+    )
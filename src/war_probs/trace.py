@@ -0,0 +1,208 @@
+"""
+Opt-in per-turn trace of a game, stored in preallocated columnar buffers.
+
+Pass a `TurnTrace` to `Game.play` to record every turn. Turn values (see
+`war_probs.metrics.turn_value`) and game swing statistics are updated online as turns
+are recorded, and the buffers are exported to NumPy or polars without building
+per-turn Python objects. With cycle detection, the trace ends at the game's last
+completed turn, where its cycle first returns to an earlier state.
+"""
+
+import math
+from array import array
+from typing import TypedDict
+
+import numpy as np
+
+from war_probs.cards import CARD_VALUES, CardCode
+from war_probs.encoded import TurnSummary
+from war_probs.metrics import turn_value_table, turn_values
+
+## -- card code recorded for players without a card in play
+NO_CARD: int = -1
+
+
+class SwingStats(TypedDict):
+    turns: int
+    momentum: float
+    mean_turn_value: float
+    std_turn_value: float
+    lead_changes: int
+    max_swing: float
+
+
+class TurnTrace:
+    """
+    Columnar record of a single game, with turn values from player 0's perspective
+    against the highest opposing card. Momentum is the running sum of turn values,
+    a lead change is a change in the sign of momentum, and the max swing is the
+    largest rise or fall in momentum from an earlier extreme.
+    """
+
+    def __init__(self, k: int = 2) -> None:
+        self.k = k
+
+        ## -- turn value lookup table, indexed by `your_value * stride + opp_value`
+        table = turn_value_table(k)
+        self._stride = table.shape[1]
+        self._turn_values: list[float] = table.ravel().tolist()
+        self.start(num_players=2, capacity=0)
+
+    def start(self, num_players: int, capacity: int) -> None:
+        """Allocate buffers for up to `capacity` turns, discarding any previous record."""
+        self.num_players = num_players
+        self.capacity = capacity
+        self.num_turns = 0
+
+        self._played_cards = array("b", bytes(capacity * num_players))
+        self._winners = array("b", bytes(capacity))
+        self._war_depths = array("B", bytes(capacity))
+        self._cards_moved = array("H", bytes(2 * capacity))
+        self._hand_sizes = array("H", bytes(2 * capacity * num_players))
+        self._turn_values_played = array("d", bytes(8 * capacity))
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        ## -- online statistics
+        self._momentum: float = 0.0
+        self._mean: float = 0.0
+        self._sum_squares: float = 0.0
+        self._lead_changes: int = 0
+        self._leader_sign: int = 0
+        self._momentum_peak: float = 0.0
+        self._momentum_trough: float = 0.0
+        self._max_swing: float = 0.0
+
+    def record(
+        self, played_cards: list[CardCode], summary: TurnSummary, hand_sizes: list[int]
+    ) -> None:
+        turn = self.num_turns
+        assert turn < self.capacity, f"Trace is full after {self.capacity} turns."
+        num_players = self.num_players
+
+        ## -- columnar buffers
+        offset = turn * num_players
+        self._played_cards[offset : offset + num_players] = array("b", played_cards)
+        self._hand_sizes[offset : offset + num_players] = array("H", hand_sizes)
+        winning_player, wars, cards_awarded, _ = summary
+        self._winners[turn] = winning_player
+        self._war_depths[turn] = wars
+        self._cards_moved[turn] = cards_awarded
+
+        ## -- turn value for player 0 against the highest opposing card
+        opp_value = max(
+            (CARD_VALUES[code] for code in played_cards[1:] if code != NO_CARD), default=0
+        )
+        your_value = CARD_VALUES[played_cards[0]] if played_cards[0] != NO_CARD else 0
+        value = self._turn_values[your_value * self._stride + opp_value]
+        self._turn_values_played[turn] = value
+        self.num_turns = turn + 1
+        self._add_turn_value(value)
+
+    def _add_turn_value(self, value: float) -> None:
+        ## -- online mean and variance (welford)
+        delta = value - self._mean
+        self._mean += delta / self.num_turns
+        self._sum_squares += delta * (value - self._mean)
+
+        ## -- momentum and swings
+        momentum = self._momentum + value
+        self._momentum = momentum
+        sign = (momentum > 0) - (momentum < 0)
+        if sign != 0:
+            if self._leader_sign != 0 and sign != self._leader_sign:
+                self._lead_changes += 1
+            self._leader_sign = sign
+        if momentum > self._momentum_peak:
+            self._momentum_peak = momentum
+        if momentum < self._momentum_trough:
+            self._momentum_trough = momentum
+        self._max_swing = max(
+            self._max_swing,
+            self._momentum_peak - momentum,
+            momentum - self._momentum_trough,
+        )
+
+    def swing_stats(self) -> SwingStats:
+        variance = self._sum_squares / self.num_turns if self.num_turns else 0.0
+        return SwingStats(
+            turns=self.num_turns,
+            momentum=self._momentum,
+            mean_turn_value=self._mean,
+            std_turn_value=math.sqrt(variance),
+            lead_changes=self._lead_changes,
+            max_swing=self._max_swing,
+        )
+
+    def turn_values_for(self, k: float) -> np.ndarray:
+        """Turn values of the recorded turns under another `k`, from the played cards."""
+        played_cards = self.to_numpy()["played_cards"]
+        played_values = np.where(
+            played_cards == NO_CARD, 0, np.asarray(CARD_VALUES)[played_cards]
+        )
+        return turn_values(played_values[:, 0], played_values[:, 1:].max(axis=1), k)
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Views onto the recorded turns, without copying the buffers."""
+        n = self.num_turns
+        return {
+            "played_cards": np.frombuffer(self._played_cards, dtype=np.int8).reshape(
+                -1, self.num_players
+            )[:n],
+            "winner": np.frombuffer(self._winners, dtype=np.int8)[:n],
+            "war_depth": np.frombuffer(self._war_depths, dtype=np.uint8)[:n],
+            "cards_moved": np.frombuffer(self._cards_moved, dtype=np.uint16)[:n],
+            "hand_sizes": np.frombuffer(self._hand_sizes, dtype=np.uint16).reshape(
+                -1, self.num_players
+            )[:n],
+            "turn_value": np.frombuffer(self._turn_values_played, dtype=np.float64)[:n],
+        }
+
+    def to_polars(self):
+        ## -- polars is only needed for export
+        import polars as pl
+
+        columns = self.to_numpy()
+        played_cards = columns.pop("played_cards")
+        hand_sizes = columns.pop("hand_sizes")
+
+        frame: dict[str, np.ndarray] = {"turn": np.arange(1, self.num_turns + 1)}
+        for player_num in range(self.num_players):
+            frame[f"played_card_{player_num}"] = played_cards[:, player_num]
+        frame.update(columns)
+        for player_num in range(self.num_players):
+            frame[f"hand_size_{player_num}"] = hand_sizes[:, player_num]
+
+        return pl.DataFrame(frame)
+
+
+def swing_stats_from_turn_values(turn_values: np.ndarray) -> SwingStats:
+    """Array version of `TurnTrace.swing_stats`, e.g., for `TurnTrace.turn_values_for`."""
+    turn_values = np.asarray(turn_values, dtype=np.float64)
+    if turn_values.size == 0:
+        return SwingStats(
+            turns=0,
+            momentum=0.0,
+            mean_turn_value=0.0,
+            std_turn_value=0.0,
+            lead_changes=0,
+            max_swing=0.0,
+        )
+
+    momentum = np.cumsum(turn_values)
+    signs = np.sign(momentum)
+    signs = signs[signs != 0]
+
+    ## -- extremes start from zero momentum, before the first turn
+    peaks = np.maximum.accumulate(np.maximum(momentum, 0.0))
+    troughs = np.minimum.accumulate(np.minimum(momentum, 0.0))
+    max_swing = max((peaks - momentum).max(), (momentum - troughs).max())
+
+    return SwingStats(
+        turns=int(turn_values.size),
+        momentum=float(momentum[-1]),
+        mean_turn_value=float(turn_values.mean()),
+        std_turn_value=float(turn_values.std()),
+        lead_changes=int(np.count_nonzero(signs[1:] != signs[:-1])),
+        max_swing=float(max_swing),
+    )